@@ -2,9 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from app.auth.deps import auth
 from app.db.mongo import profiles_col, chats_col
+from app.components.qa_service import run_qa
+from app.components.admission import AdmissionRejected
+from app.components.resilience import QAUnavailable
+from app.common.logger import get_logger
+from app.common.tracing import span
 from fastapi import Request
 from typing import Optional
 
+logger = get_logger(__name__)
+
 router = APIRouter()
 
 
@@ -15,44 +22,25 @@ class AskRequest(BaseModel):
 
 @router.post("/api/ask")
 async def ask(payload: AskRequest, request: Request, user=Depends(auth)):
-    profile = await profiles_col.find_one({"user_id": user.get("user_id")})
+    with span("mongo"):
+        profile = await profiles_col.find_one({"user_id": user.get("user_id")})
     if not profile:
         raise HTTPException(status_code=400, detail="Profile not found")
 
-    combined_input = f"""
-    USER PROFILE (VERIFIED FROM DATABASE):
-- Name: {profile.get("name", "Not provided")}
-- Date of Birth: {profile.get("dob", "Not provided")}
-- State: {profile.get("state", "Not provided")}
-- Category: {profile.get("category", "Not provided")}
-- Annual Income: {profile.get("income", "Not provided")}
-
-EDUCATION DETAILS (OCR VERIFIED):
-- Class 12 Board: {profile.get("board_12", "Not available")}
-- Class 12 Marks: {profile.get("marks_12", "Not available")}{'%' if profile.get("marks_12") else ''}
-- Year: {profile.get("year_12", "Not available")}
-- Result: {profile.get("result_12", "Not available")}
-
-USER QUESTION:
-
-{payload.question}
-"""
-    print(f"\n{'='*60}")
-    print("DEBUG - USER CONTEXT BEING SENT TO LLM (from /api/ask):")
-    print(f"{'='*60}")
-    print(combined_input)
-    print(f"{'='*60}\n")
-    
     qa_chain = getattr(request.app.state, "qa_chain", None)
     if qa_chain is None:
-        raise HTTPException(status_code=500, detail="QA chain not initialized on server")
+        raise HTTPException(
+            status_code=503,
+            detail="QA chain not initialized on server",
+            headers={"Retry-After": "5"},
+        )
 
     try:
-        result = qa_chain.invoke({"input": combined_input})
+        result = await run_qa(qa_chain, profile, payload.question, user.get("user_id"))
+    except (AdmissionRejected, QAUnavailable):
+        raise
     except Exception as e:
-        print(f" QA invocation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("QA invocation failed")
         raise HTTPException(status_code=500, detail=f"QA invocation failed: {str(e)}")
 
     answer = result.get("answer", "No response")
@@ -67,17 +55,18 @@ USER QUESTION:
                 if source:
                     sources.append(source)
             except Exception as e:
-                print(f"⚠️  Error extracting source from doc: {e}")
+                logger.warning("Error extracting source from doc: %s", e)
                 continue
     
     sources = list(set(sources))  # deduplicate
 
     # Save chat
-    await chats_col.insert_one({
-        "user_id": user.get("user_id"),
-        "question": payload.question,
-        "answer": answer,
-        "sources": sources
-    })
+    with span("mongo"):
+        await chats_col.insert_one({
+            "user_id": user.get("user_id"),
+            "question": payload.question,
+            "answer": answer,
+            "sources": sources
+        })
 
     return {"response": answer, "sources": sources}
@@ -1,44 +1,46 @@
 import os
 import uuid
-from jose import jwt
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
-from PIL import Image
-import easyocr
+import time
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 from markupsafe import Markup
 
 from fastapi import FastAPI, Request, Form, HTTPException, Depends, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.staticfiles import StaticFiles
-from dotenv import load_dotenv
-from markupsafe import Markup
 
 from app.repo import (
     list_conversations,
     create_conversation,
     get_conversation,
     get_messages,
-    add_message,
-    rename_conversation,
+    record_turn,
     delete_conversation,
     get_profile,
 )
 
-from app.components.retriever import create_qa_chain
-from app.components.vector_store import load_vector_store
+from app.components.qa_service import run_qa
+from app.components.admission import AdmissionRejected
+from app.components.resilience import QAUnavailable, breaker_states
 from app.auth.routes import router as auth_router
 from app.profile.routes import router as profile_router
 from app.documents.routes import router as documents_router
 from app.ai.routes import router as ai_router
+from app.export.routes import router as export_router
 from app.auth.deps import auth
+from app.common.logger import get_logger
+from app.common.tracing import start_trace
+from app.common.metrics import REGISTRY
+from app.config.config import OCR_WARMUP, STORAGE_GC_INTERVAL
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 app = FastAPI(
     title="Smart Govt Scheme Finder",
     description="AI-powered eligibility checker for Indian government schemes",
@@ -68,60 +70,120 @@ def nl2br(value: str):
 templates.env.filters["nl2br"] = nl2br
 
 
-def build_user_context(profile: dict) -> str:
-    """
-    Build user context from profile data.
-    The profile already contains parsed marksheet data from OCR.
-    """
-    context = f"""
-USER PROFILE (VERIFIED FROM DATABASE):
-- Name: {profile.get("name", "Not provided")}
-- Date of Birth: {profile.get("dob", "Not provided")}
-- State: {profile.get("state", "Not provided")}
-- Category: {profile.get("category", "Not provided")}
-- Annual Income: {profile.get("income", "Not provided")}
-
-EDUCATION DETAILS (OCR VERIFIED):
-- Class 12 Board: {profile.get("board_12", "Not available")}
-- Class 12 Marks: {profile.get("marks_12", "Not available")}{'%' if profile.get("marks_12") else ''}
-- Year: {profile.get("year_12", "Not available")}
-- Result: {profile.get("result_12", "Not available")}
-"""
-    print(f"\n{'='*60}")
-    print("DEBUG - USER CONTEXT BEING SENT TO LLM:")
-    print(f"{'='*60}")
-    print(context)
-    print(f"{'='*60}\n")
-    
-    return context
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        {"detail": "Server is busy, please retry shortly", "reason": exc.reason},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
-@app.on_event("startup")
-async def startup_event():
-    print("Starting application...")
+@app.exception_handler(QAUnavailable)
+async def qa_unavailable_handler(request: Request, exc: QAUnavailable):
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.middleware("http")
+async def request_trace(request: Request, call_next):
+    """Emit one structured record per request with its per-stage timings."""
+    trace = start_trace()
+    status = 500
     try:
-        print("Loading vector store...")
-        vector_store = load_vector_store()
-        if vector_store is None:
-            print("⚠️  Vector store is None (may not exist or failed to load)")
-            app.state.qa_chain = None
-        else:
-    
-            from app.components.vector_store import load_vector_store
-            from app.components.retriever import create_qa_chain
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        logger.info(
+            "request",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": status,
+                **trace.summary(),
+            },
+        )
+
 
-            app.state.qa_chain = create_qa_chain()
+# Filled in by the background warm-up; requests that need the QA chain
+# get a 503 until it is ready (see /readyz).
+app.state.qa_chain = None
+app.state.warmup = {"qa_chain": "pending", "ocr": "pending" if OCR_WARMUP else "lazy"}
 
 
-        print("Application startup complete")
+def _warm_qa_chain():
+    # Imported here so langchain, FAISS and boto3 load off the startup path
+    from app.components.vector_store import load_vector_store
+    from app.components.retriever import create_qa_chain
 
-    except Exception as e:
-        app.state.qa_chain = None
-        print(f"❌ Failed to create QA chain on startup: {e}")
-        import traceback
-        traceback.print_exc()
+    logger.info("Loading vector store...")
+    vector_store = load_vector_store()
+    if vector_store is None:
+        logger.warning("Vector store is None (may not exist or failed to load)")
+        return None
+    # The local index stands in for the Knowledge Base when it is failing
+    return create_qa_chain(vector_store=vector_store, prefetch=True)
 
-    print("Application startup complete")
+
+def _warm_ocr():
+    from app.documents.ocr import warm_up as warm_up_ocr
+    warm_up_ocr()
+
+
+async def warm_up():
+    """Load models and build the QA chain while the worker is already serving."""
+    started = time.perf_counter()
+    try:
+        app.state.qa_chain = await asyncio.to_thread(_warm_qa_chain)
+        app.state.warmup["qa_chain"] = "ready" if app.state.qa_chain else "unavailable"
+    except Exception:
+        app.state.warmup["qa_chain"] = "failed"
+        logger.exception("Failed to create QA chain on startup")
+
+    if OCR_WARMUP:
+        try:
+            await asyncio.to_thread(_warm_ocr)
+            app.state.warmup["ocr"] = "ready"
+        except Exception:
+            app.state.warmup["ocr"] = "failed"
+            logger.exception("Failed to load OCR model on startup")
+
+    logger.info(
+        "Warm-up finished in %.1f s", time.perf_counter() - started,
+        extra={"warmup": dict(app.state.warmup)},
+    )
+
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Starting application...")
+    app.state.warmup_task = asyncio.create_task(warm_up())
+    app.state.gc_task = None
+    if STORAGE_GC_INTERVAL > 0:
+        from app.storage.blobs import gc_loop
+        app.state.gc_task = asyncio.create_task(gc_loop())
+    logger.info("Application startup complete (warm-up running in background)")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if app.state.gc_task is not None:
+        app.state.gc_task.cancel()
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness probe: 200 once the QA chain is warm, 503 before that."""
+    ready = app.state.qa_chain is not None
+    # Open breakers don't fail readiness; the fallbacks keep answering
+    return JSONResponse(
+        {"ready": ready, "components": app.state.warmup, "breakers": breaker_states()},
+        status_code=200 if ready else 503,
+    )
 
 
 @app.post("/c/{conversation_id}")
@@ -135,71 +197,80 @@ async def send_message(
     if not user_input:
         return RedirectResponse(url=f"/c/{conversation_id}", status_code=303)
 
-    await add_message(conversation_id, "user", user_input)
+    # Profile and conversation are independent reads, so fetch them together
+    db_started = time.perf_counter()
+    profile, convo = await asyncio.gather(
+        get_profile(user["user_id"]),
+        get_conversation(conversation_id),
+    )
+    db_elapsed = time.perf_counter() - db_started
+
+    qa_chain = request.app.state.qa_chain
+    if profile and qa_chain is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Assistant is starting up, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
 
+    answer = None
+    sources_list = []
+    title = None
     try:
-        # Get user profile from MongoDB (contains all data including parsed marksheet info)
-        profile = await get_profile(user["user_id"])
-        
-        print(f"\n{'='*60}")
-        print(f"DEBUG - Profile fetched from MongoDB for user: {user['user_id']}")
-        print(f"{'='*60}")
-        print(f"Profile data: {profile}")
-        print(f"{'='*60}\n")
-        
         if not profile:
-            await add_message(
-                conversation_id,
-                "assistant",
-                "Please complete your profile before asking eligibility questions.",
-                sources=[],
-            )
-            return RedirectResponse(url=f"/c/{conversation_id}", status_code=303)
-
-        # Build context from profile
-        user_context = build_user_context(profile)
-
-        combined_input = f"""
-{user_context}
-
-USER QUESTION:
-{user_input}
-"""
+            answer = "Please complete your profile before asking eligibility questions."
+        else:
+            response = await run_qa(qa_chain, profile, user_input, user["user_id"])
+
+            answer = response.get("answer", "No response")
+            docs = response.get("context", [])
+
+            for d in docs[:3]:
+                sources_list.append({
+                    "source": os.path.basename(d.metadata.get("source", "Unknown")),
+                    "page": d.metadata.get("page", "NA"),
+                    "snippet": d.page_content[:240],
+                })
+
+            if convo and convo["title"] == "New Chat":
+                title = user_input[:40].strip()
+
+    except AdmissionRejected:
+        # Nothing is written; the client retries after Retry-After
+        raise
+    except QAUnavailable:
+        logger.warning("QA unavailable (conversation=%s)", conversation_id)
+        answer = "The assistant is not responding right now. Please try again in a minute."
+        sources_list = []
+    except Exception:
+        logger.exception("send_message failed (conversation=%s)", conversation_id)
+        answer = "Sorry, something went wrong while answering. Please try again."
+        sources_list = []
 
-        qa_chain = request.app.state.qa_chain
-        response = qa_chain.invoke({"input": combined_input})
+    # User message, assistant reply and auto-title go out as one update
+    write_started = time.perf_counter()
+    await record_turn(
+        conversation_id,
+        [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": answer, "sources": sources_list},
+        ],
+        title=title,
+    )
+    db_elapsed += time.perf_counter() - write_started
+
+    logger.info(
+        "send_message db latency: %.1f ms (conversation=%s)",
+        db_elapsed * 1000,
+        conversation_id,
+    )
 
-        answer = response.get("answer", "No response")
-        docs = response.get("context", [])
+    return RedirectResponse(url=f"/c/{conversation_id}", status_code=303)
 
-        sources_list = []
-        for d in docs[:3]:
-            sources_list.append({
-                "source": os.path.basename(d.metadata.get("source", "Unknown")),
-                "page": d.metadata.get("page", "NA"),
-                "snippet": d.page_content[:240],
-            })
-
-        await add_message(conversation_id, "assistant", answer, sources=sources_list)
-
-        convo = await get_conversation(conversation_id)
-        if convo and convo["title"] == "New Chat":
-            await rename_conversation(conversation_id, user_input[:40].strip())
-
-    except Exception as e:
-        print(f"\n{'='*60}")
-        print(f"ERROR in send_message: {str(e)}")
-        print(f"{'='*60}\n")
-        import traceback
-        traceback.print_exc()
-        await add_message(
-            conversation_id,
-            "assistant",
-            f"Internal error: {str(e)}",
-            sources=[],
-        )
 
-    return RedirectResponse(url=f"/c/{conversation_id}", status_code=303)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 # DEBUG ENDPOINT
@@ -223,4 +294,5 @@ async def debug_check_profile(user_id: str):
 app.include_router(auth_router)
 app.include_router(profile_router)
 app.include_router(documents_router)
-app.include_router(ai_router)
\ No newline at end of file
+app.include_router(ai_router)
+app.include_router(export_router)
\ No newline at end of file
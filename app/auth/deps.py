@@ -3,7 +3,9 @@ from jose import jwt, JWTError
 from typing import Optional
 from app.db.mongo import users_col
 from app.common.security import SECRET_KEY, ALGORITHM
+from app.common.tracing import timed
 
+@timed("auth")
 async def auth(authorization: Optional[str] = Header(None)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
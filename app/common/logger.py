@@ -1,5 +1,11 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import re
 from datetime import datetime
 
 LOGS_DIR = "logs"
@@ -7,13 +13,116 @@ os.makedirs(LOGS_DIR,exist_ok = True)
 
 LOG_FILE = os.path.join(LOGS_DIR,f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
 
-logging.basicConfig(
-    filename = LOG_FILE,
-    format = '%(asctime)s - %(levelname)s - %(message)s',
-    level = logging.INFO
-)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_REDACT_PII = os.getenv("LOG_REDACT_PII", "true").lower() not in ("0", "false", "no")
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Structured fields whose values are never written to the log.
+PII_KEYS = {
+    "name", "dob", "email", "password", "password_hash", "income",
+    "profile", "extracted_text", "prompt", "question", "answer", "token",
+}
+
+_PII_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"\b\d{4}\s?\d{4}\s?\d{4}\b"), "<aadhaar>"),
+    (re.compile(r"(?<!\d)(?:\+91[\s-]?)?[6-9]\d{9}(?!\d)"), "<phone>"),
+]
+
+
+def redact(value):
+    """Mask PII in a log value (strings, and nested dicts/lists)."""
+    if isinstance(value, str):
+        for pattern, repl in _PII_PATTERNS:
+            value = pattern.sub(repl, value)
+        return value
+    if isinstance(value, dict):
+        return {
+            k: ("<redacted>" if k in PII_KEYS else redact(v))
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+class RedactionFilter(logging.Filter):
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        for key in set(vars(record)) - _RESERVED:
+            value = getattr(record, key)
+            setattr(record, key, "<redacted>" if key in PII_KEYS else redact(value))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in set(vars(record)) - _RESERVED:
+            entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves the record structured for JsonFormatter. The
+    default prepare() formats the message with a plain Formatter and folds
+    the traceback into it; here the traceback is rendered into exc_text
+    (while its frames are still alive) and msg/args are left alone.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _setup():
+    """
+    Route all records through a queue so request handlers never block on
+    file or console I/O; a listener thread formats and writes them.
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return
+
+    formatter = JsonFormatter()
+    file_handler = logging.FileHandler(LOG_FILE)
+    console_handler = logging.StreamHandler()
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+        if LOG_REDACT_PII:
+            handler.addFilter(RedactionFilter())
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    root.addHandler(StructuredQueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+
+_setup()
+
 
 def get_logger(name):
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    logger.setLevel(LOG_LEVEL)
+    return logger
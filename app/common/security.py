@@ -1,12 +1,17 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from functools import lru_cache
 from jose import jwt
 import os
 
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto"
-)
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib loads its hash backends on import; defer until a password is checked
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto"
+    )
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret")
 ALGORITHM = "HS256"
@@ -15,11 +20,11 @@ ALGORITHM = "HS256"
 def hash_password(password: str) -> str:
     if not password:
         raise ValueError("Password cannot be empty")
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return get_pwd_context().verify(password, hashed)
 
 
 def create_token(user_id: str) -> str:
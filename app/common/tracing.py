@@ -0,0 +1,92 @@
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from app.common.metrics import STAGE_LATENCY, STAGE_ERRORS
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+class RequestTrace:
+    """Per-request accumulator of stage timings (auth, mongo, retrieval, llm, ocr)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        # PDF pages are OCR'd on pool threads that report into the same trace
+        self._lock = threading.Lock()
+
+    def add(self, name: str, elapsed: float):
+        with self._lock:
+            span = self.spans.setdefault(name, {"ms": 0.0, "count": 0})
+            span["ms"] += elapsed * 1000
+            span["count"] += 1
+
+    def summary(self) -> dict:
+        return {
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "spans": {
+                name: {"ms": round(s["ms"], 1), "count": s["count"]}
+                for name, s in self.spans.items()
+            },
+        }
+
+
+def start_trace() -> RequestTrace:
+    trace = RequestTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def detach_trace():
+    """Stop attributing spans to the request a background task was started from."""
+    _current_trace.set(None)
+
+
+@contextmanager
+def span(name: str, operation: str = ""):
+    """
+    Time a block and attribute it to `name` on the current request, if any.
+    Every span also feeds the stage latency histogram and error counter.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage=name, operation=operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.labels(stage=name, operation=operation).observe(elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, elapsed)
+
+
+def timed(name: str, operation: Optional[str] = None):
+    """Decorator form of `span`; the operation defaults to the function name."""
+    def decorator(fn):
+        op = operation or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, op):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, op):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
@@ -0,0 +1,156 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from app.common.logger import get_logger
+from app.common.metrics import Counter, Gauge, Histogram
+
+logger = get_logger(__name__)
+
+QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for an admission slot", ["controller"])
+ACTIVE = Gauge("admission_active", "Requests holding an admission slot", ["controller"])
+QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time spent waiting for an admission slot",
+    ["controller"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+REJECTED = Counter("admission_rejected_total", "Requests turned away", ["controller", "reason"])
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status to return."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(f"Request rejected ({reason}), retry after {retry_after}s")
+
+
+class AdmissionController:
+    """
+    Bounds concurrent calls to a slow backend.
+
+    At most `max_concurrent` callers run at once. Up to `max_queue` more wait,
+    served round-robin across users so one user's burst cannot starve others.
+    A user may hold at most `max_per_user` running + queued requests (429),
+    and a full queue or a wait longer than `max_wait` seconds fails fast (503).
+
+    `admit` applies both. Callers that share one backend call between several
+    users take `user_slot` per caller and `slot` once for the shared call.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float, max_per_user: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_per_user = max_per_user
+
+        self._active = 0
+        self._queued = 0
+        self._per_user = {}
+        # user_id -> deque of waiter futures, in round-robin order
+        self._waiters = OrderedDict()
+        self._avg_service = 1.0
+
+    def _retry_after(self) -> int:
+        backlog = (self._queued + 1) / max(1, self.max_concurrent)
+        return max(1, min(60, math.ceil(backlog * self._avg_service)))
+
+    def _reject(self, reason: str, status_code: int):
+        REJECTED.labels(controller=self.name, reason=reason).inc()
+        raise AdmissionRejected(reason, status_code, self._retry_after())
+
+    def _update_gauges(self):
+        QUEUE_DEPTH.labels(controller=self.name).set(self._queued)
+        ACTIVE.labels(controller=self.name).set(self._active)
+
+    def _wake_next(self):
+        while self._waiters and self._active < self.max_concurrent:
+            user_id, queue = next(iter(self._waiters.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(user_id)
+            else:
+                del self._waiters[user_id]
+            if waiter.done():
+                continue
+            self._queued -= 1
+            self._active += 1
+            waiter.set_result(None)
+
+    async def _acquire(self, user_id: str):
+        self._wake_next()
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", 503)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(waiter)
+        self._queued += 1
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as we gave up; hand the slot back
+                self._active -= 1
+                self._wake_next()
+            else:
+                waiter.cancel()
+                self._queued -= 1
+                queue = self._waiters.get(user_id)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._waiters[user_id]
+            self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("queue_timeout", 503)
+
+    def _release_user(self, user_id: str):
+        self._per_user[user_id] -= 1
+        if not self._per_user[user_id]:
+            del self._per_user[user_id]
+
+    @asynccontextmanager
+    async def user_slot(self, user_id: str):
+        """Count one request against `user_id`'s cap for the block (429 when over it)."""
+        # Running and queued requests both count towards the per-user cap
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            self._reject("per_user_limit", 429)
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        try:
+            yield
+        finally:
+            self._release_user(user_id)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        """Hold one of the concurrent slots, queueing round-robin by `user_id` (503 when saturated)."""
+        queued_at = time.perf_counter()
+        await self._acquire(user_id)
+        QUEUE_WAIT.labels(controller=self.name).observe(time.perf_counter() - queued_at)
+        self._update_gauges()
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._avg_service = 0.8 * self._avg_service + 0.2 * (time.perf_counter() - started)
+            self._active -= 1
+            self._wake_next()
+            self._update_gauges()
+
+    @asynccontextmanager
+    async def admit(self, user_id: str):
+        async with self.user_slot(user_id), self.slot(user_id):
+            yield
@@ -0,0 +1,104 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+from app.common.logger import get_logger
+from app.common.metrics import Counter, Gauge
+from app.config.config import (
+    AWS_REGION,
+    AWS_MAX_POOL_CONNECTIONS,
+    AWS_CONNECT_TIMEOUT,
+    AWS_READ_TIMEOUT,
+    AWS_RETRY_MODE,
+    AWS_MAX_ATTEMPTS,
+)
+
+logger = get_logger(__name__)
+
+AWS_CALLS = Counter("aws_api_calls_total", "AWS API calls", ["service", "operation"])
+AWS_ATTEMPTS = Counter("aws_http_attempts_total", "HTTP attempts sent, including retries", ["service"])
+AWS_INFLIGHT = Gauge("aws_inflight_calls", "AWS API calls in progress", ["service"])
+AWS_POOL_SATURATED = Counter(
+    "aws_pool_saturated_total",
+    "Calls started while every pooled connection was busy (new TLS connection needed)",
+    ["service"],
+)
+AWS_CONNECTIONS = Gauge("aws_connections_opened", "Connections opened by the client's pools", ["service"])
+AWS_POOL_REQUESTS = Gauge("aws_pool_requests", "Requests served by the client's pools", ["service"])
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _pool_stats(client):
+    """Sum urllib3 pool counters behind a botocore client (read-only)."""
+    opened = requests = 0
+    try:
+        manager = client._endpoint.http_session._manager
+        pools = list(manager.pools._container.values())
+    except AttributeError:
+        return 0, 0
+    for pool in pools:
+        opened += getattr(pool, "num_connections", 0)
+        requests += getattr(pool, "num_requests", 0)
+    return opened, requests
+
+
+def _instrument(client, service: str):
+    inflight = AWS_INFLIGHT.labels(service=service)
+
+    def before_call(model, **kwargs):
+        AWS_CALLS.labels(service=service, operation=model.name).inc()
+        if inflight.get() >= AWS_MAX_POOL_CONNECTIONS:
+            AWS_POOL_SATURATED.labels(service=service).inc()
+        inflight.inc()
+
+    def after_call(**kwargs):
+        inflight.dec()
+
+    def before_send(**kwargs):
+        AWS_ATTEMPTS.labels(service=service).inc()
+
+    events = client.meta.events
+    events.register("before-call", before_call)
+    events.register("after-call", after_call)
+    events.register("after-call-error", after_call)
+    events.register("before-send", before_send)
+
+    AWS_CONNECTIONS.labels(service=service).set_function(lambda: _pool_stats(client)[0])
+    AWS_POOL_REQUESTS.labels(service=service).set_function(lambda: _pool_stats(client)[1])
+
+
+def get_client(service: str, region: str = AWS_REGION, endpoint_url: str = None):
+    """
+    Long-lived, shared boto3 client for `service`. Clients are thread-safe, so
+    the LLM, embeddings and KB retriever reuse one pool of keep-alive
+    connections per service instead of each opening their own.
+    `endpoint_url` points the client at an S3-compatible stand-in.
+    """
+    key = (service, region, endpoint_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            config = Config(
+                region_name=region,
+                max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+                connect_timeout=AWS_CONNECT_TIMEOUT,
+                read_timeout=AWS_READ_TIMEOUT,
+                tcp_keepalive=True,
+                retries={"mode": AWS_RETRY_MODE, "max_attempts": AWS_MAX_ATTEMPTS},
+            )
+            # Sessions are not thread-safe; build each client from its own
+            client = boto3.session.Session().client(service, config=config, endpoint_url=endpoint_url)
+            _instrument(client, service)
+            _clients[key] = client
+            logger.info(
+                "Created %s client (pool=%d, retries=%s)",
+                service, AWS_MAX_POOL_CONNECTIONS, AWS_RETRY_MODE,
+            )
+    return client
@@ -1,17 +1,20 @@
 import os
-import boto3
 from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
 from app.common.logger import get_logger
+from app.components.aws_clients import get_client
+from app.config.config import BEDROCK_BACKEND, FAKE_KB_LATENCY, FAKE_KB_RESULTS
 
 logger = get_logger(__name__)
 
 def get_bedrock_retriever():
+    if BEDROCK_BACKEND == "fake":
+        from app.components.fake_bedrock import FakeKnowledgeBaseRetriever
+        logger.info("Using fake Knowledge Base retriever (latency=%s)", FAKE_KB_LATENCY)
+        return FakeKnowledgeBaseRetriever(latency=FAKE_KB_LATENCY, k=FAKE_KB_RESULTS)
+
     logger.info("Initializing Bedrock Knowledge Base retriever")
 
-    client = boto3.client(
-        "bedrock-agent-runtime",
-        region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1")
-    )
+    client = get_client("bedrock-agent-runtime")
 
     retriever = AmazonKnowledgeBasesRetriever(
         knowledge_base_id=os.getenv("BEDROCK_KB_ID"),  # 
@@ -0,0 +1,356 @@
+"""
+Shared cache for QA answers, retrievals and embeddings.
+
+One backend per process, chosen with CACHE_BACKEND:
+
+    memory  in-process LRU; fastest, but private to each uvicorn worker
+    sqlite  file at CACHE_SQLITE_PATH, shared by every worker on the node
+    redis   CACHE_REDIS_URL, shared across nodes; "fakeredis://" runs an
+            in-process stand-in (needs the fakeredis package) for tests
+
+Callers use a namespace, which prefixes keys, applies the namespace's TTL
+and reports hits/misses under cache_hits_total{cache=<namespace>}. Values
+must be JSON-serialisable. The memory and sqlite backends evict each
+namespace's least recently used entries to keep it under its own bound
+(CACHE_MAX_MB), so one namespace filling up never evicts another's; for
+redis, configure maxmemory with an LRU policy.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.common.logger import get_logger
+from app.common.metrics import CACHE_HITS, CACHE_MISSES, Counter, Gauge
+from app.config.config import CACHE_BACKEND, CACHE_MAX_MB, CACHE_SQLITE_PATH, CACHE_REDIS_URL
+
+logger = get_logger(__name__)
+
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Entries evicted to stay within the size bound", ["backend"])
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held by the shared cache", ["backend"])
+CACHE_BYTES = Gauge("cache_bytes", "Approximate bytes held by the shared cache", ["backend"])
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def _decode(data: bytes):
+    return json.loads(data)
+
+
+def _namespace_of(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class CacheBackend:
+    """
+    Key -> JSON value store with per-entry TTL. Keys arrive namespaced;
+    `max_bytes` is the bound for the namespace being written.
+    """
+
+    name = "base"
+    # Whether calls do I/O and should be kept off the event loop
+    blocking = True
+
+    def get_many(self, keys: List[str]) -> Dict[str, object]:
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, object], ttl: Optional[float], max_bytes: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    name = "memory"
+    blocking = False
+
+    def __init__(self):
+        # namespace -> OrderedDict of key -> (value, size, expires), least recent first
+        self._spaces = {}
+        self._bytes = {}  # namespace -> bytes held
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                namespace = _namespace_of(key)
+                entries = self._spaces.get(namespace)
+                entry = entries.get(key) if entries else None
+                if entry is None:
+                    continue
+                if entry[2] is not None and entry[2] <= now:
+                    self._remove(namespace, key)
+                    continue
+                entries.move_to_end(key)
+                found[key] = entry[0]
+        return found
+
+    def set_many(self, items, ttl, max_bytes=None):
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            touched = set()
+            for key, value in items.items():
+                namespace = _namespace_of(key)
+                entries = self._spaces.setdefault(namespace, OrderedDict())
+                size = len(_encode(value)) + len(key)
+                if key in entries:
+                    self._remove(namespace, key)
+                entries[key] = (value, size, expires)
+                self._bytes[namespace] = self._bytes.get(namespace, 0) + size
+                touched.add(namespace)
+            if max_bytes is None:
+                return
+            for namespace in touched:
+                entries = self._spaces[namespace]
+                while self._bytes[namespace] > max_bytes and entries:
+                    self._remove(namespace, next(iter(entries)))
+                    CACHE_EVICTIONS.labels(backend=self.name).inc()
+
+    def _remove(self, namespace, key):
+        _, size, _ = self._spaces[namespace].pop(key)
+        self._bytes[namespace] -= size
+
+    def delete(self, key):
+        namespace = _namespace_of(key)
+        with self._lock:
+            if key in self._spaces.get(namespace, ()):
+                self._remove(namespace, key)
+
+    def stats(self):
+        return {"entries": sum(len(e) for e in self._spaces.values()), "bytes": sum(self._bytes.values())}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    One SQLite file in WAL mode shared by the node's workers. Reads refresh
+    an access time (at most once a minute per entry) that drives LRU
+    eviction; a namespace's size bound is enforced every `check_every`
+    writes to it.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, check_every: int = 200):
+        self.path = path
+        self.check_every = check_every
+        self._writes = {}  # namespace -> writes since its last size check
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " expires REAL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        conn = self._conn()
+        found, stale = {}, []
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value, expires, accessed FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            for key, value, expires, accessed in rows:
+                if expires is not None and expires <= now:
+                    continue
+                found[key] = _decode(value)
+                if accessed < now - 60:
+                    stale.append(key)
+        if stale:
+            conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(now, k) for k in stale])
+        return found
+
+    def set_many(self, items, ttl, max_bytes=None):
+        now = time.time()
+        expires = now + ttl if ttl else None
+        rows = []
+        for key, value in items.items():
+            data = _encode(value)
+            rows.append((key, data, len(data) + len(key), expires, now))
+            namespace = _namespace_of(key)
+            self._writes[namespace] = self._writes.get(namespace, 0) + 1
+        conn = self._conn()
+        conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+        if max_bytes is None:
+            return
+        for namespace in {_namespace_of(key) for key in items}:
+            if self._writes[namespace] >= self.check_every:
+                self._writes[namespace] = 0
+                self._evict(conn, now, namespace, max_bytes)
+
+    def _evict(self, conn, now, namespace, max_bytes):
+        # The namespace's keys are the primary-key range ["<ns>:", "<ns>;")
+        bounds = (f"{namespace}:", f"{namespace};")
+        conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE key >= ? AND key < ?", bounds
+        ).fetchone()[0]
+        if total <= max_bytes:
+            return
+        # Trim to 90% so eviction doesn't run on every subsequent write
+        excess = total - int(max_bytes * 0.9)
+        evicted = 0
+        rows = conn.execute(
+            "SELECT key, size FROM entries WHERE key >= ? AND key < ? ORDER BY accessed", bounds
+        ).fetchall()
+        for key, size in rows:
+            if excess <= 0:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            excess -= size
+            evicted += 1
+        CACHE_EVICTIONS.labels(backend=self.name).inc(evicted)
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def stats(self):
+        entries, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": total}
+
+
+class RedisBackend(CacheBackend):
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "gsf:"):
+        if url.startswith("fakeredis://"):
+            import fakeredis
+            self.client = fakeredis.FakeRedis()
+        else:
+            import redis
+            self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        values = self.client.mget([self.prefix + k for k in keys])
+        return {k: _decode(v) for k, v in zip(keys, values) if v is not None}
+
+    def set_many(self, items, ttl, max_bytes=None):
+        # Bounded by the server's maxmemory policy, not per namespace
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.prefix + key, _encode(value), ex=int(ttl) if ttl else None)
+        pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def stats(self):
+        info = self.client.info("memory")
+        return {"entries": self.client.dbsize(), "bytes": info.get("used_memory", 0)}
+
+
+class CacheNamespace:
+    """A slice of the cache with its own key prefix, TTL and hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend, name: str, ttl: Optional[float], max_bytes: Optional[int] = None):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl is None or self.ttl > 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, object]:
+        if not self.enabled or not keys:
+            return {}
+        try:
+            found = self.backend.get_many([self._key(k) for k in keys])
+        except Exception:
+            # The cache is an optimisation; a broken backend is a miss
+            logger.exception("Cache read failed (%s)", self.name)
+            found = {}
+        result = {k: found[self._key(k)] for k in keys if self._key(k) in found}
+        CACHE_HITS.labels(cache=self.name).inc(len(result))
+        CACHE_MISSES.labels(cache=self.name).inc(len(keys) - len(result))
+        return result
+
+    def set_many(self, items: Dict[str, object]):
+        if not self.enabled or not items:
+            return
+        try:
+            self.backend.set_many({self._key(k): v for k, v in items.items()}, self.ttl, self.max_bytes)
+        except Exception:
+            logger.exception("Cache write failed (%s)", self.name)
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value):
+        self.set_many({key: value})
+
+    async def aget(self, key: str):
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value):
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.set, key, value)
+        return self.set(key, value)
+
+
+@lru_cache(maxsize=1)
+def get_cache_backend() -> CacheBackend:
+    if CACHE_BACKEND == "sqlite":
+        backend = SQLiteBackend(CACHE_SQLITE_PATH)
+    elif CACHE_BACKEND == "redis":
+        backend = RedisBackend(CACHE_REDIS_URL)
+    else:
+        backend = MemoryBackend()
+    logger.info("Using %s cache backend", backend.name)
+
+    CACHE_ENTRIES.labels(backend=backend.name).set_function(lambda: _safe_stats(backend).get("entries", 0))
+    CACHE_BYTES.labels(backend=backend.name).set_function(lambda: _safe_stats(backend).get("bytes", 0))
+    return backend
+
+
+def _safe_stats(backend) -> dict:
+    try:
+        return backend.stats()
+    except Exception:
+        return {}
+
+
+def cache_namespace(name: str, ttl: Optional[float]) -> CacheNamespace:
+    """
+    Namespace `name` on the process-wide backend, bounded by its CACHE_MAX_MB
+    entry; ttl 0 disables it, None never expires.
+    """
+    max_mb = CACHE_MAX_MB.get(name, CACHE_MAX_MB.get("*", 32))
+    return CacheNamespace(get_cache_backend(), name, ttl, int(max_mb * 1024 * 1024))
@@ -0,0 +1,91 @@
+import re
+
+from langchain_core.documents import Document
+
+from app.config.config import CONTEXT_TOKEN_BUDGET, CONTEXT_DEDUP_THRESHOLD
+from app.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+# Rough chars-per-token ratio for the Titan/Nova tokenizers on this corpus.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate, good enough for budgeting prompt size."""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _overlap(a: set, b: set) -> float:
+    """Overlap coefficient, so a chunk contained in another counts as a duplicate."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _rank(docs):
+    """
+    Order by reranker score, else retriever score, when every doc carries
+    one; otherwise keep retriever order.
+    """
+    for key in ("rerank_score", "score"):
+        scores = [doc.metadata.get(key) for doc in docs]
+        if docs and all(isinstance(s, (int, float)) for s in scores):
+            return [doc for _, doc in sorted(zip(scores, docs), key=lambda p: -p[0])]
+    return list(docs)
+
+
+def dedupe_documents(docs, threshold: float = CONTEXT_DEDUP_THRESHOLD):
+    """Drop chunks that overlap a higher-ranked chunk by more than `threshold`."""
+    kept, kept_shingles = [], []
+    for doc in docs:
+        shingles = _shingles(doc.page_content)
+        if any(_overlap(shingles, seen) >= threshold for seen in kept_shingles):
+            continue
+        kept.append(doc)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def assemble_context(docs, max_tokens: int = CONTEXT_TOKEN_BUDGET):
+    """
+    Turn raw retriever output into the documents that go into the prompt:
+    rank, deduplicate overlapping chunks, then keep the most relevant ones
+    that fit within `max_tokens`.
+    """
+    if not docs:
+        return []
+
+    ranked = dedupe_documents(_rank(docs))
+
+    selected, used = [], 0
+    for doc in ranked:
+        tokens = estimate_tokens(doc.page_content)
+        if used + tokens > max_tokens:
+            if not selected:
+                # Always keep the top chunk, cut down to the budget
+                selected.append(Document(
+                    page_content=doc.page_content[: max_tokens * CHARS_PER_TOKEN],
+                    metadata=doc.metadata,
+                ))
+                used = max_tokens
+            break
+        selected.append(doc)
+        used += tokens
+
+    logger.info(
+        "Context assembled: %d retrieved, %d after dedup, %d kept (~%d tokens)",
+        len(docs), len(ranked), len(selected), used,
+    )
+    return selected
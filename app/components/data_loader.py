@@ -1,9 +1,11 @@
+import asyncio
 import os 
 from app.components.pdf_loader import load_pdf_files,create_text_chunks
 
 from app.components.vector_store import save_vector_store
+from app.components.dedup import deduplicate_chunks
 
-from app.config.config import DB_FAISS_PATH
+from app.config.config import DB_FAISS_PATH, DEDUP_ENABLED, DIGEST_REBUILD_ON_INGEST
 from app.common.logger import get_logger
 from app.common.custom_exception import CustomException
 
@@ -19,6 +21,10 @@ def process_and_store_pdfs():
         text_chunks = create_text_chunks(documents)
         logger.info(f"Chunks created: {len(text_chunks)}")
 
+        if DEDUP_ENABLED:
+            text_chunks, dedup_stats = deduplicate_chunks(text_chunks)
+            logger.info(f"Chunks after dedup: {len(text_chunks)} (ratio {dedup_stats['dedup_ratio']})")
+
         db = save_vector_store(text_chunks)
 
         if db:
@@ -28,10 +34,18 @@ def process_and_store_pdfs():
             # ensure callers know the operation failed.
             raise CustomException("Vectorstore creation returned no database object")
 
+        return db
+
     except Exception as e:
         error_message = CustomException("Failed to create vectorstore", e)
         logger.error(str(error_message))
+        raise error_message from e
 
         
 if __name__ == "__main__":
-    process_and_store_pdfs()       
\ No newline at end of file
+    process_and_store_pdfs()
+
+    if DIGEST_REBUILD_ON_INGEST:
+        # The corpus version changed with the new PDFs; refresh the digests
+        from app.components.digests import build_digests
+        asyncio.run(build_digests())       
\ No newline at end of file
@@ -0,0 +1,121 @@
+import hashlib
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.common.logger import get_logger
+from app.config.config import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE
+
+logger = get_logger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _shingle_hashes(text: str, size: int) -> np.ndarray:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little") for g in grams],
+        dtype=np.uint64,
+    )
+
+
+class MinHasher:
+    """MinHash signatures from `num_perm` universal hash functions over word shingles."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, shingle_size: int = DEDUP_SHINGLE_SIZE, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = _shingle_hashes(text, self.shingle_size)
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a * x + b) mod p, truncated to 32 bits, for every (perm, shingle) pair
+        values = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME & _MAX_HASH
+        return values.min(axis=1)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _merge(cluster):
+    """Collapse a cluster into its longest chunk, keeping every source reference."""
+    representative = max(cluster, key=lambda d: len(d.page_content))
+    references = []
+    for doc in cluster:
+        ref = {"source": doc.metadata.get("source"), "page": doc.metadata.get("page")}
+        if ref not in references:
+            references.append(ref)
+
+    metadata = dict(representative.metadata)
+    metadata["sources"] = sorted({r["source"] for r in references if r["source"]})
+    metadata["references"] = references
+    states = sorted({d.metadata["state"] for d in cluster if d.metadata.get("state")})
+    if states:
+        metadata["states"] = states
+    metadata["duplicates"] = len(cluster)
+    return Document(page_content=representative.page_content, metadata=metadata)
+
+
+def deduplicate_chunks(chunks, threshold: float = DEDUP_THRESHOLD, bands: int = DEDUP_BANDS):
+    """
+    Collapse near-duplicate chunks (estimated Jaccard >= `threshold` on word
+    shingles). LSH banding finds candidate pairs without comparing every pair.
+    Returns (chunks, stats).
+    """
+    if not chunks:
+        return [], {"input": 0, "output": 0, "removed": 0, "dedup_ratio": 0.0}
+
+    hasher = MinHasher()
+    rows = hasher.num_perm // bands
+    signatures = np.stack([hasher.signature(c.page_content) for c in chunks])
+
+    parent = list(range(len(chunks)))
+    for band in range(bands):
+        buckets = {}
+        band_sig = signatures[:, band * rows:(band + 1) * rows]
+        for i, row in enumerate(band_sig):
+            buckets.setdefault(row.tobytes(), []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = _find(parent, first), _find(parent, other)
+                if root_a == root_b:
+                    continue
+                similarity = np.mean(signatures[first] == signatures[other])
+                if similarity >= threshold:
+                    parent[root_b] = root_a
+
+    clusters = {}
+    for i in range(len(chunks)):
+        clusters.setdefault(_find(parent, i), []).append(chunks[i])
+
+    result = [
+        cluster[0] if len(cluster) == 1 else _merge(cluster)
+        for cluster in clusters.values()
+    ]
+    stats = {
+        "input": len(chunks),
+        "output": len(result),
+        "removed": len(chunks) - len(result),
+        "dedup_ratio": round((len(chunks) - len(result)) / len(chunks), 4),
+    }
+    logger.info(
+        "Near-duplicate elimination: %d -> %d chunks (%.1f%% removed)",
+        stats["input"], stats["output"], stats["dedup_ratio"] * 100,
+    )
+    return result, stats
@@ -0,0 +1,238 @@
+"""
+Precomputed eligibility digests.
+
+Most first questions are the generic "what schemes am I eligible for?" from
+profiles that differ only in details the eligibility rules don't look at.
+Profiles are bucketed by state x category x income band x class-12 marks
+band, and a batch job answers the generic question once per bucket. Each
+answer is stored with the version of the scheme corpus it was generated from.
+A digest is served only while that version still matches data/pdfs, so
+re-ingesting the corpus invalidates every digest until the job is re-run.
+
+    python -m app.components.digests            # build missing/stale digests
+    python -m app.components.digests --force    # rebuild everything
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import os
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from app.common.logger import get_logger
+from app.common.metrics import CACHE_HITS, CACHE_MISSES
+from app.components.profile_context import build_qa_input
+from app.config.config import DATA_PATH, DIGEST_STATES, DIGEST_CONCURRENCY
+from app.db.mongo import digests_col
+
+logger = get_logger(__name__)
+
+# Asked exactly like this (after normalize_question) the question is generic
+GENERIC_QUESTIONS = {
+    "what schemes am i eligible for",
+    "which schemes am i eligible for",
+    "what schemes can i apply for",
+    "which schemes can i apply for",
+    "what scholarships am i eligible for",
+    "which scholarships am i eligible for",
+    "am i eligible for any scheme",
+    "am i eligible for any schemes",
+    "show me schemes i am eligible for",
+    "eligible schemes",
+}
+DIGEST_QUESTION = "What schemes am I eligible for?"
+
+CATEGORIES = ("GEN", "OBC", "SC", "ST")
+_CATEGORY_ALIASES = {"GENERAL": "GEN", "UR": "GEN", "UNRESERVED": "GEN"}
+
+# (upper bound exclusive, band); common scholarship income ceilings
+INCOME_BANDS = ((100000, "0-1L"), (250000, "1L-2.5L"), (800000, "2.5L-8L"), (float("inf"), "8L+"))
+MARKS_BANDS = ((60, "<60"), (75, "60-75"), (float("inf"), "75+"))
+UNKNOWN = "unknown"
+
+_INCOME_LABELS = {
+    "0-1L": "Up to Rs 1,00,000",
+    "1L-2.5L": "Rs 1,00,000 - 2,50,000",
+    "2.5L-8L": "Rs 2,50,000 - 8,00,000",
+    "8L+": "Above Rs 8,00,000",
+}
+
+
+def _normalize_state(state) -> str:
+    return " ".join(str(state).split()).lower() if state else ""
+
+
+def _band(value, bands):
+    for upper, band in bands:
+        if value < upper:
+            return band
+
+
+def profile_bucket(profile: dict):
+    """Bucket dict for `profile`, or None when it falls outside every archetype."""
+    state = _normalize_state(profile.get("state"))
+    if state not in {_normalize_state(s) for s in DIGEST_STATES}:
+        return None
+
+    category = str(profile.get("category") or "").strip().upper()
+    category = _CATEGORY_ALIASES.get(category, category) or UNKNOWN
+    if category != UNKNOWN and category not in CATEGORIES:
+        return None
+
+    income = profile.get("income")
+    if income in (None, ""):
+        income_band = UNKNOWN
+    else:
+        try:
+            income_band = _band(float(str(income).replace(",", "")), INCOME_BANDS)
+        except ValueError:
+            return None
+
+    marks = profile.get("marks_12")
+    if "FAIL" in str(profile.get("result_12") or "").upper():
+        marks_band = "fail"
+    elif marks in (None, ""):
+        marks_band = UNKNOWN
+    else:
+        try:
+            marks_band = _band(float(str(marks).rstrip("%")), MARKS_BANDS)
+        except ValueError:
+            return None
+
+    return {"state": state, "category": category, "income": income_band, "marks": marks_band}
+
+
+def bucket_key(bucket: dict) -> str:
+    return "|".join((bucket["state"], bucket["category"], bucket["income"], bucket["marks"]))
+
+
+def digest_key(profile: dict, normalized_question: str):
+    """Digest id to serve for this request, or None if it isn't a digest question."""
+    if normalized_question not in GENERIC_QUESTIONS:
+        return None
+    bucket = profile_bucket(profile)
+    return bucket_key(bucket) if bucket else None
+
+
+def all_buckets():
+    states = [_normalize_state(s) for s in DIGEST_STATES]
+    categories = CATEGORIES + (UNKNOWN,)
+    incomes = tuple(band for _, band in INCOME_BANDS) + (UNKNOWN,)
+    marks = tuple(band for _, band in MARKS_BANDS) + ("fail", UNKNOWN)
+    for state, category, income, mark in itertools.product(states, categories, incomes, marks):
+        yield {"state": state, "category": category, "income": income, "marks": mark}
+
+
+def archetype_profile(bucket: dict) -> dict:
+    """Stand-in profile for a bucket, with bands in place of exact values."""
+    profile = {"state": bucket["state"].title()}
+    if bucket["category"] != UNKNOWN:
+        profile["category"] = bucket["category"]
+    if bucket["income"] != UNKNOWN:
+        profile["income"] = _INCOME_LABELS[bucket["income"]]
+    if bucket["marks"] == "fail":
+        profile["result_12"] = "FAIL"
+    elif bucket["marks"] != UNKNOWN:
+        profile["marks_12"] = bucket["marks"]
+        profile["result_12"] = "PASS"
+    return profile
+
+
+@lru_cache(maxsize=8)
+def _hash_corpus(data_path: str, files: tuple) -> str:
+    digest = hashlib.sha256()
+    for name, _, _ in files:
+        digest.update(name.encode())
+        with open(os.path.join(data_path, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def corpus_version(data_path: str = DATA_PATH) -> str:
+    """
+    Content hash of the scheme PDFs. Files are only re-read when their
+    name, size or mtime changes, so this is cheap to call per request.
+    """
+    try:
+        entries = [e for e in os.scandir(data_path) if e.name.lower().endswith(".pdf")]
+    except FileNotFoundError:
+        return "none"
+    files = tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entries))
+    return _hash_corpus(data_path, files)
+
+
+async def get_digest(key: str):
+    """Stored payload ({"answer", "context"}) for `key` at the current corpus version."""
+    digest = await digests_col.find_one(
+        {"_id": key, "corpus_version": corpus_version()}, {"answer": 1, "context": 1}
+    )
+    if digest is None:
+        CACHE_MISSES.labels(cache="digest").inc()
+        return None
+    CACHE_HITS.labels(cache="digest").inc()
+    return {"answer": digest["answer"], "context": digest.get("context", [])}
+
+
+async def build_digests(force: bool = False, concurrency: int = DIGEST_CONCURRENCY) -> dict:
+    """Generate a digest for every bucket missing one at the current corpus version."""
+    from app.components.retriever import create_qa_chain
+    from app.components.qa_service import to_payload
+
+    version = corpus_version()
+    started = time.perf_counter()
+    done = set()
+    if not force:
+        done = {d["_id"] async for d in digests_col.find({"corpus_version": version}, {"_id": 1})}
+
+    qa_chain = create_qa_chain()
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"corpus_version": version, "built": 0, "skipped": 0, "failed": 0}
+
+    async def build(bucket):
+        key = bucket_key(bucket)
+        if key in done:
+            stats["skipped"] += 1
+            return
+        qa_input = build_qa_input(archetype_profile(bucket), DIGEST_QUESTION)
+        try:
+            async with semaphore:
+                result = await qa_chain.ainvoke({"input": qa_input, "question": DIGEST_QUESTION})
+        except Exception:
+            logger.exception("Digest generation failed for %s", key)
+            stats["failed"] += 1
+            return
+        await digests_col.update_one(
+            {"_id": key},
+            {"$set": {
+                "bucket": bucket,
+                "corpus_version": version,
+                "generated_at": datetime.utcnow().isoformat(),
+                **to_payload(result),
+            }},
+            upsert=True,
+        )
+        stats["built"] += 1
+
+    await asyncio.gather(*(build(bucket) for bucket in all_buckets()))
+
+    if not stats["failed"]:
+        res = await digests_col.delete_many({"corpus_version": {"$ne": version}})
+        stats["removed_stale"] = res.deleted_count
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    logger.info("Digest build finished", extra={"digests": stats})
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute eligibility digests")
+    parser.add_argument("--force", action="store_true", help="Rebuild digests that are already current")
+    parser.add_argument("--concurrency", type=int, default=DIGEST_CONCURRENCY)
+    args = parser.parse_args()
+    print(asyncio.run(build_digests(force=args.force, concurrency=args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,80 @@
-import boto3
+import hashlib
 import os
 from langchain_aws import BedrockEmbeddings
-from app.config.config import BEDROCK_EMBEDDING_ID
+from langchain_core.embeddings import Embeddings
+from app.config.config import (
+    BEDROCK_EMBEDDING_ID,
+    BEDROCK_BACKEND,
+    FAKE_EMBEDDING_LATENCY,
+    EMBEDDING_BACKEND,
+    LOCAL_EMBEDDING_MODEL,
+    CACHE_TTL_EMBEDDING,
+)
 from app.common.logger import get_logger
+from app.components.aws_clients import get_client
+from app.components.cache import cache_namespace
 
 logger = get_logger(__name__)
 
-def get_embedding_model():
-    client = boto3.client(
-        "bedrock-runtime",
-        region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1")
-    )
 
-    return BedrockEmbeddings(
-        client=client,
-        model_id=BEDROCK_EMBEDDING_ID or "amazon.titan-embed-text-v2:0",
-    )
+class CachedEmbeddings(Embeddings):
+    """
+    Look vectors up in the shared embedding cache by (model, text) and only
+    send the misses to the wrapped model, in one batch.
+    """
+
+    def __init__(self, model: Embeddings, model_id: str):
+        self.model = model
+        self.model_id = model_id
+        self.cache = cache_namespace("embedding", CACHE_TTL_EMBEDDING)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode()).hexdigest()
+
+    def embed_documents(self, texts):
+        keys = [self._key(t) for t in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        if missing:
+            vectors = self.model.embed_documents(missing)
+            fresh = {self._key(t): v for t, v in zip(missing, vectors)}
+            self.cache.set_many(fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text):
+        key = self._key("query\0" + text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.model.embed_query(text)
+            self.cache.set(key, vector)
+        return vector
+
+
+def get_embedding_model(backend=None, cached=True):
+    """
+    Embedding model for `backend` (default EMBEDDING_BACKEND). Unless
+    `cached` is False it is wrapped in the shared embedding cache.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    model, model_id = _load_embedding_model(backend)
+    if cached and cache_namespace("embedding", CACHE_TTL_EMBEDDING).enabled:
+        return CachedEmbeddings(model, model_id)
+    return model
+
+
+def _load_embedding_model(backend):
+
+    if backend == "local":
+        from app.components.local_embeddings import get_local_embeddings
+        return get_local_embeddings(), f"local:{LOCAL_EMBEDDING_MODEL}"
+
+    if BEDROCK_BACKEND == "fake" or backend == "fake":
+        from app.components.fake_bedrock import FakeEmbeddings
+        logger.info("Using fake embeddings (latency=%s)", FAKE_EMBEDDING_LATENCY)
+        return FakeEmbeddings(latency=FAKE_EMBEDDING_LATENCY), "fake"
+
+    client = get_client("bedrock-runtime")
+
+    model_id = BEDROCK_EMBEDDING_ID or "amazon.titan-embed-text-v2:0"
+    return BedrockEmbeddings(client=client, model_id=model_id), f"bedrock:{model_id}"
@@ -0,0 +1,159 @@
+"""
+Local stand-ins for the Bedrock LLM, Titan embeddings and the Knowledge Base
+retriever, used when BEDROCK_BACKEND=fake. They cost nothing, need no AWS
+credentials, and simulate latency from a configurable distribution so the
+request path can be load-tested offline.
+
+Latency specs are "<dist>:<params>" in milliseconds:
+    fixed:200  uniform:100:400  normal:300:50  lognormal:1500:0.4 (median, sigma)
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+
+from app.config.config import DATA_PATH
+
+_WORD_RE = re.compile(r"\w+")
+
+_FILLER = (
+    "scheme eligibility students income certificate category state board "
+    "scholarship apply portal documents deadline marks percentage verified "
+    "benefit amount annual family domicile caste residence application"
+).split()
+
+
+def parse_latency(spec: str):
+    """Return a zero-arg callable producing a latency sample in seconds."""
+    kind, *params = spec.split(":")
+    params = [float(p) for p in params]
+
+    if kind == "fixed":
+        sample = lambda: params[0]
+    elif kind == "uniform":
+        sample = lambda: random.uniform(params[0], params[1])
+    elif kind == "normal":
+        sample = lambda: random.gauss(params[0], params[1])
+    elif kind == "lognormal":
+        mu = math.log(params[0])
+        sample = lambda: random.lognormvariate(mu, params[1])
+    else:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+
+    return lambda: max(0.0, sample()) / 1000.0
+
+
+def _filler_text(seed: str, n_tokens: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(_FILLER) for _ in range(n_tokens))
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that sleeps for a sampled latency and returns `output_tokens` words."""
+
+    latency: str = "lognormal:1500:0.4"
+    output_tokens: int = 250
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bedrock-chat"
+
+    def _result(self, messages) -> ChatResult:
+        prompt = "".join(str(m.content) for m in messages)
+        text = _filler_text(prompt, self.output_tokens)
+        message = AIMessage(
+            content=text,
+            response_metadata={
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": self.output_tokens,
+                }
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(parse_latency(self.latency)())
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(parse_latency(self.latency)())
+        return self._result(messages)
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic feature-hashing embedder. Texts sharing words get similar
+    vectors, so local FAISS search over it behaves sensibly.
+    """
+
+    def __init__(self, dimension: int = 1024, latency: str = "fixed:0"):
+        self.dimension = dimension
+        self._latency = parse_latency(latency)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._latency())
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self._latency())
+        return self._embed(text)
+
+
+class FakeKnowledgeBaseRetriever(BaseRetriever):
+    """Returns `k` synthetic scheme chunks attributed to the PDFs in data/pdfs."""
+
+    latency: str = "lognormal:300:0.3"
+    k: int = 6
+    chunk_tokens: int = 120
+    sources: Optional[List[str]] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        time.sleep(parse_latency(self.latency)())
+
+        sources = self.sources or _corpus_sources()
+        rng = random.Random(query)
+        docs = []
+        for rank in range(self.k):
+            source = rng.choice(sources)
+            docs.append(Document(
+                page_content=_filler_text(f"{query}:{rank}", self.chunk_tokens),
+                metadata={
+                    "source": source,
+                    "page": rng.randint(0, 20),
+                    "score": round(1.0 - rank * 0.08, 3),
+                },
+            ))
+        return docs
+
+
+def _corpus_sources() -> List[str]:
+    if os.path.isdir(DATA_PATH):
+        names = sorted(f for f in os.listdir(DATA_PATH) if f.lower().endswith(".pdf"))
+        if names:
+            return names
+    return ["synthetic.pdf"]
@@ -1,9 +1,10 @@
 import os
 from app.common.logger import get_logger
+from app.components.aws_clients import get_client
 from app.common.custom_exception import CustomException
 from app.common.langsmith import setup_langsmith
-import boto3
 from langchain_aws import ChatBedrock
+from app.config.config import BEDROCK_BACKEND, FAKE_LLM_LATENCY, FAKE_LLM_OUTPUT_TOKENS
 
 
 logger = get_logger(__name__)
@@ -12,7 +13,12 @@ _LANGSMITH_SETUP_DONE = False
 
 
 def load_llm():
-    client = boto3.client("bedrock-runtime",region_name = os.getenv("AWS_DEFAULT_REGION","us-east-1"))
+    if BEDROCK_BACKEND == "fake":
+        from app.components.fake_bedrock import FakeChatModel
+        logger.info("Using fake LLM (latency=%s)", FAKE_LLM_LATENCY)
+        return FakeChatModel(latency=FAKE_LLM_LATENCY, output_tokens=FAKE_LLM_OUTPUT_TOKENS)
+
+    client = get_client("bedrock-runtime")
     llm = ChatBedrock(
         model_id = os.getenv("BEDROCK_MODEL_ID", "amazon.nova-pro-v1:0"),
         client=client,
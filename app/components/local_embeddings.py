@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.common.logger import get_logger
+from app.config.config import (
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_RUNTIME,
+    LOCAL_EMBEDDING_ONNX_FILE,
+    LOCAL_EMBEDDING_THREADS,
+    LOCAL_EMBEDDING_BATCH_SIZE,
+)
+
+logger = get_logger(__name__)
+
+
+def _load_model(model_name: str, runtime: str, onnx_file: str, threads: int):
+    # Imported lazily: sentence-transformers pulls in torch / onnxruntime
+    from sentence_transformers import SentenceTransformer
+
+    if runtime == "onnx":
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        return SentenceTransformer(
+            model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={
+                "file_name": onnx_file,
+                "provider": "CPUExecutionProvider",
+                "session_options": options,
+            },
+        )
+
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    return SentenceTransformer(model_name, device="cpu")
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    sentence-transformers embeddings computed on CPU, by default through an
+    int8-quantized ONNX export of the model. Vectors are L2-normalised.
+    """
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_EMBEDDING_MODEL,
+        runtime: str = LOCAL_EMBEDDING_RUNTIME,
+        onnx_file: str = LOCAL_EMBEDDING_ONNX_FILE,
+        threads: int = LOCAL_EMBEDDING_THREADS,
+        batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+    ):
+        logger.info("Loading local embedding model %s (%s, threads=%s)", model_name, runtime, threads or "auto")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = _load_model(model_name, runtime, onnx_file, threads)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+@lru_cache(maxsize=1)
+def get_local_embeddings() -> LocalEmbeddings:
+    """One model per process; loading it takes seconds."""
+    return LocalEmbeddings()
@@ -5,23 +5,25 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from app.common.logger import get_logger
 from app.common.custom_exception import CustomException
 
-from app.config.config import DATA_PATH,CHUNK_SIZE,CHUNK_OVERLAP
+from app.components.scheme_chunker import chunk_by_scheme
+
+from app.config.config import DATA_PATH,CHUNK_SIZE,CHUNK_OVERLAP,CHUNKER
 
 logger = get_logger(__name__)
-def load_pdf_files():
+def load_pdf_files(data_path=DATA_PATH):
     documents = []
 
     try:
-        if not os.path.exists(DATA_PATH):
-            raise CustomException(f"Data path does not exist: {DATA_PATH}")
+        if not os.path.exists(data_path):
+            raise CustomException(f"Data path does not exist: {data_path}")
 
-        logger.info(f"Loading files from {DATA_PATH}")
+        logger.info(f"Loading files from {data_path}")
 
-        for fname in sorted(os.listdir(DATA_PATH)):
+        for fname in sorted(os.listdir(data_path)):
             if not fname.lower().endswith(".pdf"):
                 continue
 
-            fpath = os.path.join(DATA_PATH, fname)
+            fpath = os.path.join(data_path, fname)
 
             try:
                 logger.info("Loading file %s", fpath)
@@ -63,9 +65,11 @@ def create_text_chunks(documents):
         
         logger.info(f"Splitting {len(documents)} documents into chunks")    
         
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size = CHUNK_SIZE,chunk_overlap = CHUNK_OVERLAP,separators = ["\n\n","\n",".","-"] )
-        
-        text_chunks = text_splitter.split_documents(documents)
+        if CHUNKER == "scheme":
+            text_chunks = chunk_by_scheme(documents)
+        else:
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size = CHUNK_SIZE,chunk_overlap = CHUNK_OVERLAP,separators = ["\n\n","\n",".","-"] )
+            text_chunks = text_splitter.split_documents(documents)
         
         logger.info(f"Generated {len(text_chunks)} text chunks")
         return text_chunks
@@ -0,0 +1,176 @@
+"""
+Speculative retrieval prefetch.
+
+When a user saves their basic profile or a marksheet updates it, we already
+know what their first question will be scoped to (state, category, income,
+marks). A background task runs the profile-scoped scheme retrieval right
+away and parks the result in a short-lived per-user cache; the retrieval
+step of that user's next QA call takes it instead of calling the Knowledge
+Base, or awaits it if it is still in flight.
+
+Nothing is prefetched when the generic question would be answered without
+the chain anyway (a current digest for the profile's bucket or a cached
+answer). The retriever to prefetch with is registered explicitly by the
+serving chain (set_prefetch_retriever); other chains never become the target.
+
+An entry is only used while the profile is unchanged (same fingerprint) and
+younger than PREFETCH_TTL, and only for the question it was retrieved for:
+any other question retrieves normally and leaves the entry for a later
+generic one, since its answer is cached under that question. Outcomes
+are counted in prefetch_total{outcome}: scheduled, skipped (answer already
+precomputed), hit, hit_inflight, wasted (expired, replaced, evicted or
+profile changed before use), failed.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.runnables import RunnableLambda
+
+from app.common.logger import get_logger
+from app.common.metrics import Counter
+from app.common.tracing import detach_trace, span
+from app.components.profile_context import build_qa_input, profile_fingerprint
+from app.components.qa_service import has_precomputed_answer, normalize_question
+from app.config.config import PREFETCH_ENABLED, PREFETCH_TTL, PREFETCH_MAX_USERS
+
+logger = get_logger(__name__)
+
+PREFETCH = Counter("prefetch_total", "Speculative retrieval prefetches by outcome", ["outcome"])
+
+# Retrieval is scoped by the profile block; the question is the generic one
+PREFETCH_QUESTION = "What schemes am I eligible for?"
+_PREFETCH_KEY = normalize_question(PREFETCH_QUESTION)
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "created", "task")
+
+    def __init__(self, fingerprint, task):
+        self.fingerprint = fingerprint
+        self.created = time.monotonic()
+        self.task = task
+
+
+_entries = OrderedDict()  # user_id -> _Entry, oldest first
+_lock = threading.Lock()  # the sync retrieval path runs in executor threads
+_retriever = None
+
+
+def _waste(entry: _Entry, reason: str):
+    PREFETCH.labels(outcome="wasted").inc()
+    logger.debug("Prefetch wasted (%s)", reason)
+    if not entry.task.done():
+        # May be called from an executor thread; cancel on the task's own loop
+        entry.task.get_loop().call_soon_threadsafe(entry.task.cancel)
+
+
+def _expire_locked(now: float):
+    while _entries:
+        user_id, entry = next(iter(_entries.items()))
+        if now - entry.created < PREFETCH_TTL and len(_entries) <= PREFETCH_MAX_USERS:
+            break
+        del _entries[user_id]
+        _waste(entry, "expired" if now - entry.created >= PREFETCH_TTL else "evicted")
+
+
+async def _retrieve(query: str):
+    detach_trace()  # runs after the triggering request has returned
+    try:
+        with span("prefetch", "retrieval"):
+            return await _retriever.ainvoke(query)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        PREFETCH.labels(outcome="failed").inc()
+        logger.exception("Prefetch retrieval failed")
+        raise
+
+
+def set_prefetch_retriever(retriever):
+    """Make `retriever` (the serving chain's retriever) the one prefetches run against."""
+    global _retriever
+    _retriever = retriever
+
+
+async def schedule_prefetch(user_id: str, profile: dict):
+    """Start prefetching `user_id`'s scheme retrieval for `profile` in the background."""
+    if not PREFETCH_ENABLED or _retriever is None or not user_id or not profile or not profile.get("state"):
+        return
+    try:
+        precomputed = await has_precomputed_answer(profile, PREFETCH_QUESTION)
+    except Exception:
+        # Best effort: a failed lookup must not fail the profile save
+        logger.exception("Prefetch digest lookup failed")
+        return
+    if precomputed:
+        # run_qa answers the likely first question without retrieving
+        PREFETCH.labels(outcome="skipped").inc()
+        return
+
+    task = asyncio.ensure_future(_retrieve(build_qa_input(profile, PREFETCH_QUESTION)))
+    # Failures are counted in _retrieve; keep asyncio from logging them again
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    with _lock:
+        previous = _entries.pop(user_id, None)
+        if previous is not None:
+            _waste(previous, "replaced")
+        _entries[user_id] = _Entry(profile_fingerprint(profile), task)
+        _expire_locked(time.monotonic())
+    PREFETCH.labels(outcome="scheduled").inc()
+
+
+def _take(user_id, fingerprint, question):
+    """Pop `user_id`'s entry if it is still usable for this profile and question."""
+    if not user_id or normalize_question(question or "") != _PREFETCH_KEY:
+        return None
+    with _lock:
+        entry = _entries.pop(user_id, None)
+    if entry is None:
+        return None
+    if time.monotonic() - entry.created >= PREFETCH_TTL:
+        _waste(entry, "expired")
+        return None
+    if entry.fingerprint != fingerprint:
+        _waste(entry, "profile changed")
+        return None
+    if entry.task.done() and (entry.task.cancelled() or entry.task.exception() is not None):
+        return None
+    return entry
+
+
+def prefetching_retriever(retriever):
+    """
+    Wrap the chain's retriever: use a pending prefetch for this user when
+    there is one, else retrieve normally. Input is the chain's input dict.
+    """
+    def invoke(x, config):
+        entry = _take(x.get("user_id"), x.get("profile_fingerprint"), x.get("question"))
+        # A prefetch still running belongs to the event loop; only a
+        # finished one can be used from this thread
+        if entry is not None and entry.task.done():
+            PREFETCH.labels(outcome="hit").inc()
+            return entry.task.result()
+        if entry is not None:
+            _waste(entry, "in flight on sync path")
+        return retriever.invoke(x["input"], config)
+
+    async def ainvoke(x, config):
+        entry = _take(x.get("user_id"), x.get("profile_fingerprint"), x.get("question"))
+        if entry is not None:
+            outcome = "hit" if entry.task.done() else "hit_inflight"
+            try:
+                docs = await asyncio.shield(entry.task)
+            except asyncio.CancelledError:
+                if not entry.task.cancelled():
+                    raise  # this request was cancelled, not the prefetch
+            except Exception:
+                pass  # already counted as failed; fall back to a fresh retrieval
+            else:
+                PREFETCH.labels(outcome=outcome).inc()
+                return docs
+        return await retriever.ainvoke(x["input"], config)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="prefetching_retriever")
@@ -0,0 +1,106 @@
+import hashlib
+from datetime import date, datetime
+from functools import lru_cache
+
+from app.config.config import PROFILE_CONTEXT_CACHE_SIZE
+from app.common.metrics import CACHE_HITS, CACHE_MISSES
+
+# Profile fields that feed the prompt. Any change to one of these is a new
+# profile version as far as the prompt is concerned. Name and exact date of
+# birth are left out (age is what eligibility rules use), so users with the
+# same eligibility profile produce the same prompt and can share answers.
+PROFILE_FIELDS = (
+    "age",
+    "state",
+    "category",
+    "income",
+    "board_12",
+    "marks_12",
+    "year_12",
+    "result_12",
+)
+
+_MISSING = object()
+
+_DOB_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+
+
+def _age(dob):
+    """Age in whole years, or the raw value when it is not a recognised date."""
+    if not dob:
+        return _MISSING
+    for fmt in _DOB_FORMATS:
+        try:
+            born = datetime.strptime(str(dob), fmt).date()
+        except ValueError:
+            continue
+        today = date.today()
+        return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+    return str(dob)
+
+
+def profile_version(profile: dict) -> tuple:
+    """Hashable snapshot of the prompt-relevant profile fields."""
+    version = []
+    for field in PROFILE_FIELDS:
+        if field == "age":
+            value = _age(profile.get("dob"))
+        else:
+            value = profile.get(field, _MISSING)
+        if isinstance(value, (list, dict, set)):
+            value = repr(value)
+        version.append(value)
+    return tuple(version)
+
+
+def profile_fingerprint(profile: dict) -> str:
+    """Stable digest of the profile version, shared by users with identical profiles."""
+    return hashlib.sha256(repr(profile_version(profile)).encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=PROFILE_CONTEXT_CACHE_SIZE)
+def _render_profile_context(version: tuple) -> str:
+    fields = dict(zip(PROFILE_FIELDS, version))
+
+    def value(field, default):
+        v = fields[field]
+        return default if v is _MISSING else v
+
+    marks = value("marks_12", "Not available")
+    return f"""
+USER PROFILE (VERIFIED FROM DATABASE):
+- Age: {value("age", "Not provided")}
+- State: {value("state", "Not provided")}
+- Category: {value("category", "Not provided")}
+- Annual Income: {value("income", "Not provided")}
+
+EDUCATION DETAILS (OCR VERIFIED):
+- Class 12 Board: {value("board_12", "Not available")}
+- Class 12 Marks: {marks}{'%' if fields["marks_12"] is not _MISSING and fields["marks_12"] else ''}
+- Year: {value("year_12", "Not available")}
+- Result: {value("result_12", "Not available")}
+"""
+
+
+def build_profile_context(profile: dict) -> str:
+    """
+    Build the profile block of the prompt.
+    Rendered once per profile version and served from cache afterwards.
+    """
+    hits = _render_profile_context.cache_info().hits
+    context = _render_profile_context(profile_version(profile))
+    if _render_profile_context.cache_info().hits > hits:
+        CACHE_HITS.labels(cache="profile_context").inc()
+    else:
+        CACHE_MISSES.labels(cache="profile_context").inc()
+    return context
+
+
+def build_qa_input(profile: dict, question: str) -> str:
+    """Full QA chain input: profile block followed by the user question."""
+    return f"""
+{build_profile_context(profile)}
+
+USER QUESTION:
+{question}
+"""
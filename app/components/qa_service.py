@@ -0,0 +1,144 @@
+import re
+
+from langchain_core.documents import Document
+
+from app.common.logger import get_logger
+from app.common.metrics import INFLIGHT_JOBS
+from app.components.profile_context import build_qa_input, profile_fingerprint
+from app.components.singleflight import SingleFlight, FileLockStore
+from app.components.admission import AdmissionController, AdmissionRejected
+from app.components.digests import digest_key, get_digest, corpus_version
+from app.components.cache import cache_namespace
+from app.components.resilience import BreakerOpen, FALLBACKS, QAUnavailable, StageTimeout
+from app.config.config import (
+    QA_COALESCE_DIR,
+    QA_COALESCE_RESULT_TTL,
+    QA_MAX_CONCURRENT,
+    QA_MAX_QUEUE,
+    QA_MAX_QUEUE_WAIT,
+    QA_MAX_PER_USER,
+    CACHE_TTL_QA,
+    CACHE_TTL_QA_FALLBACK,
+)
+
+logger = get_logger(__name__)
+
+_qa_flight = SingleFlight(
+    "qa",
+    store=FileLockStore(QA_COALESCE_DIR, result_ttl=QA_COALESCE_RESULT_TTL) if QA_COALESCE_DIR else None,
+)
+
+_answer_cache = cache_namespace("qa", CACHE_TTL_QA)
+# Last good answer per key, served only when the chain fails
+_fallback_answers = cache_namespace("qa_fallback", CACHE_TTL_QA_FALLBACK)
+
+qa_admission = AdmissionController(
+    "qa",
+    max_concurrent=QA_MAX_CONCURRENT,
+    max_queue=QA_MAX_QUEUE,
+    max_wait=QA_MAX_QUEUE_WAIT,
+    max_per_user=QA_MAX_PER_USER,
+)
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().strip("?.! ").lower()
+
+
+def qa_key(profile: dict, question: str) -> str:
+    return f"{profile_fingerprint(profile)}:{normalize_question(question)}"
+
+
+def to_payload(result: dict) -> dict:
+    return {
+        "answer": result.get("answer", "No response"),
+        "context": [
+            {"page_content": d.page_content, "metadata": dict(d.metadata)}
+            for d in result.get("context", [])
+        ],
+    }
+
+
+def from_payload(payload: dict) -> dict:
+    return {
+        "answer": payload["answer"],
+        "context": [Document(**d) for d in payload["context"]],
+    }
+
+
+def _answer_cache_key(profile: dict, question: str) -> str:
+    # The data/pdfs hash doesn't see Knowledge Base re-syncs; those show up
+    # as answers expire (CACHE_TTL_QA)
+    return f"{corpus_version()}:{qa_key(profile, question)}"
+
+
+async def has_precomputed_answer(profile: dict, question: str) -> bool:
+    """Whether run_qa would answer this from a digest or the answer cache, without the chain."""
+    key = digest_key(profile, normalize_question(question))
+    if key is not None and await get_digest(key) is not None:
+        return True
+    return await _answer_cache.aget(_answer_cache_key(profile, question)) is not None
+
+
+async def run_qa(qa_chain, profile: dict, question: str, user_id: str) -> dict:
+    """
+    Answer `question` for `profile` with the QA chain.
+
+    The generic eligibility question is answered from the precomputed digest
+    for the profile's bucket when one is current, and a recent answer for
+    the same profile fingerprint and question comes from the shared answer
+    cache. Otherwise concurrent
+    requests with the same profile fingerprint and question share one
+    retrieval + generation. Each caller counts against its own per-user cap
+    and the shared call must get a global admission slot (either raises
+    AdmissionRejected). If that fails, the last good
+    answer for the key is served; with none, a deadline or open breaker
+    raises QAUnavailable.
+    Returns {"answer": str, "context": [Document]}.
+    """
+    key = digest_key(profile, normalize_question(question))
+    if key is not None:
+        digest = await get_digest(key)
+        if digest is not None:
+            return from_payload(digest)
+
+    key = qa_key(profile, question)
+    cache_key = _answer_cache_key(profile, question)
+    cached = await _answer_cache.aget(cache_key)
+    if cached is not None:
+        return from_payload(cached)
+
+    qa_input = build_qa_input(profile, question)
+
+    async def invoke():
+        # Shared by everyone who joins the flight: only the global slot here,
+        # each caller's own per-user cap is checked below
+        async with qa_admission.slot(user_id):
+            with INFLIGHT_JOBS.labels(job="qa").track_inprogress():
+                result = await qa_chain.ainvoke({
+                    "input": qa_input,
+                    "question": question,
+                    "user_id": user_id,
+                    "profile_fingerprint": profile_fingerprint(profile),
+                })
+        payload = to_payload(result)
+        # Answers built on the FAISS fallback are served, not remembered
+        if not any(d["metadata"].get("retrieval_fallback") for d in payload["context"]):
+            await _answer_cache.aset(cache_key, payload)
+            await _fallback_answers.aset(cache_key, payload)
+        return payload
+
+    try:
+        async with qa_admission.user_slot(user_id):
+            payload = await _qa_flight.do(key, invoke)
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        payload = await _fallback_answers.aget(cache_key)
+        if payload is None:
+            if isinstance(e, (StageTimeout, BreakerOpen)):
+                raise QAUnavailable(int(getattr(e, "retry_after", 0)) or 30) from e
+            raise
+        logger.warning("QA chain failed (%s), serving the last good answer", e)
+        FALLBACKS.labels(stage="qa", fallback="cached_answer").inc()
+    return from_payload(payload)
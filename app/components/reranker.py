@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+from app.common.logger import get_logger
+from app.common.metrics import Counter
+from app.config.config import (
+    RERANK_MODEL,
+    RERANK_THRESHOLD,
+    RERANK_MIN_KEEP,
+    RERANK_MAX_KEEP,
+    RERANK_BATCH_SIZE,
+    RERANK_MAX_LENGTH,
+)
+
+logger = get_logger(__name__)
+
+RERANKED = Counter("rerank_documents_total", "Retrieved chunks kept or dropped by the reranker", ["outcome"])
+
+
+@lru_cache(maxsize=1)
+def get_reranker():
+    """Load the cross-encoder once per process, on CPU."""
+    # Imported lazily: sentence-transformers pulls in torch
+    from sentence_transformers import CrossEncoder
+
+    logger.info("Loading reranker model %s", RERANK_MODEL)
+    return CrossEncoder(RERANK_MODEL, max_length=RERANK_MAX_LENGTH, device="cpu")
+
+
+def rerank_documents(
+    query: str,
+    docs,
+    threshold: float = RERANK_THRESHOLD,
+    min_keep: int = RERANK_MIN_KEEP,
+    max_keep: int = RERANK_MAX_KEEP,
+):
+    """
+    Score (query, chunk) pairs with the cross-encoder and keep the chunks
+    scoring at least `threshold`, best first, bounded to [min_keep, max_keep].
+    Each kept chunk gets its score in metadata["rerank_score"].
+    """
+    if not docs:
+        return []
+
+    pairs = [(query, doc.page_content) for doc in docs]
+    scores = get_reranker().predict(pairs, batch_size=RERANK_BATCH_SIZE, show_progress_bar=False)
+
+    ranked = sorted(zip(scores, docs), key=lambda p: -p[0])
+    keep = sum(1 for score, _ in ranked if score >= threshold)
+    keep = max(min(keep, max_keep), min(min_keep, len(ranked)))
+
+    kept = [
+        Document(page_content=doc.page_content, metadata={**doc.metadata, "rerank_score": float(score)})
+        for score, doc in ranked[:keep]
+    ]
+    RERANKED.labels(outcome="kept").inc(len(kept))
+    RERANKED.labels(outcome="dropped").inc(len(docs) - len(kept))
+    logger.info(
+        "Reranked %d chunks, kept %d (top score %.2f)", len(docs), len(kept), float(ranked[0][0]),
+    )
+    return kept
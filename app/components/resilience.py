@@ -0,0 +1,220 @@
+"""
+Deadlines, hedged calls and circuit breakers for the Bedrock stages.
+
+A stage call (Knowledge Base retrieval, LLM generation) runs under a
+deadline. Each stage has a breaker that watches a sliding window of
+outcomes: when at least BREAKER_MIN_CALLS calls in the last BREAKER_WINDOW
+seconds failed or took longer than the stage's slow-call threshold at a rate
+of BREAKER_FAILURE_RATE or more, it opens and calls fail fast with
+BreakerOpen for BREAKER_OPEN_SECONDS. Then one probe call is let through
+(half-open); it closes the breaker on success and re-opens it otherwise.
+
+Callers decide what to fall back to; state is exported as
+circuit_breaker_state{breaker} (0 closed, 1 half-open, 2 open) and through
+`breaker_states()` on /readyz.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+from app.common.logger import get_logger
+from app.common.metrics import Counter, Gauge
+from app.config.config import (
+    BREAKER_FAILURE_RATE,
+    BREAKER_MIN_CALLS,
+    BREAKER_WINDOW,
+    BREAKER_OPEN_SECONDS,
+)
+
+logger = get_logger(__name__)
+
+BREAKER_STATE = Gauge("circuit_breaker_state", "0 closed, 1 half-open, 2 open", ["breaker"])
+BREAKER_TRANSITIONS = Counter("circuit_breaker_transitions_total", "Breaker state changes", ["breaker", "state"])
+STAGE_TIMEOUTS = Counter("stage_timeouts_total", "Stage calls that hit their deadline", ["stage"])
+HEDGED = Counter("hedged_requests_total", "Hedged calls by outcome (launched, won)", ["stage", "outcome"])
+FALLBACKS = Counter("stage_fallbacks_total", "Calls served by a fallback", ["stage", "fallback"])
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_breakers = {}  # name -> CircuitBreaker
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage: str, seconds: float):
+        self.stage = stage
+        super().__init__(f"{stage} did not finish within {seconds:.1f}s")
+
+
+class BreakerOpen(Exception):
+    def __init__(self, breaker: str, retry_after: float):
+        self.breaker = breaker
+        self.retry_after = retry_after
+        super().__init__(f"{breaker} circuit is open, retry in {retry_after:.0f}s")
+
+
+class QAUnavailable(Exception):
+    """Bedrock is failing or too slow and there was nothing to fall back to."""
+
+    def __init__(self, retry_after: int = 30):
+        self.retry_after = retry_after
+        super().__init__("The assistant is temporarily unavailable")
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        slow_call: float,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        min_calls: int = BREAKER_MIN_CALLS,
+        window: float = BREAKER_WINDOW,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+    ):
+        self.name = name
+        self.slow_call = slow_call
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe = None  # token of the half-open probe in flight
+        self._probes = 0
+        self._calls = deque()  # (finished_at, failed)
+        # Sync chain calls record from executor threads
+        self._lock = threading.Lock()
+        BREAKER_STATE.labels(breaker=name).set_function(lambda: _STATE_VALUES[self.state])
+        _breakers[name] = self
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning("Circuit breaker %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        BREAKER_TRANSITIONS.labels(breaker=self.name, state=state).inc()
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._calls.clear()
+
+    def before_call(self):
+        """
+        Raise BreakerOpen unless a call may go through now. Returns the probe
+        token when this call is the half-open probe, else None; pass it back
+        to record()/cancelled().
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    raise BreakerOpen(self.name, remaining)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe is not None:
+                    raise BreakerOpen(self.name, self.open_seconds)
+                self._probes += 1
+                self._probe = self._probes
+                return self._probe
+            return None
+
+    def record(self, elapsed: float, error: bool, probe=None):
+        failed = error or elapsed > self.slow_call
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                # Only the probe decides; calls admitted before the breaker
+                # opened may still be finishing and say nothing about now
+                if probe is not None and probe == self._probe:
+                    self._probe = None
+                    self._transition(OPEN if failed else CLOSED)
+                return
+            if self.state == OPEN or probe is not None:
+                return  # admitted before the breaker opened, or a stale probe
+
+            self._calls.append((now, failed))
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._calls.popleft()
+            if len(self._calls) >= self.min_calls:
+                failures = sum(1 for _, f in self._calls if f)
+                if failures / len(self._calls) >= self.failure_rate:
+                    self._transition(OPEN)
+
+    def cancelled(self, probe=None):
+        """The caller went away mid-call; don't count it either way."""
+        with self._lock:
+            if probe is not None and probe == self._probe:
+                self._probe = None
+
+    def call(self, fn, *args, **kwargs):
+        probe = self.before_call()
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(time.perf_counter() - started, error=True, probe=probe)
+            raise
+        self.record(time.perf_counter() - started, error=False, probe=probe)
+        return result
+
+    async def acall(self, fn, *args, **kwargs):
+        probe = self.before_call()
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.cancelled(probe)
+            raise
+        except Exception:
+            self.record(time.perf_counter() - started, error=True, probe=probe)
+            raise
+        self.record(time.perf_counter() - started, error=False, probe=probe)
+        return result
+
+
+def breaker_states() -> dict:
+    return {name: breaker.state for name, breaker in _breakers.items()}
+
+
+async def with_deadline(stage: str, seconds: float, coro):
+    """Await `coro`, raising StageTimeout after `seconds` (0 disables the deadline)."""
+    if not seconds:
+        return await coro
+    try:
+        return await asyncio.wait_for(coro, timeout=seconds)
+    except asyncio.TimeoutError:
+        STAGE_TIMEOUTS.labels(stage=stage).inc()
+        raise StageTimeout(stage, seconds) from None
+
+
+async def hedged(stage: str, make_call, delay: float):
+    """
+    Start `make_call()`; if it hasn't finished after `delay` seconds start a
+    second, identical call and return whichever succeeds first. The loser is
+    cancelled. Only for idempotent reads; `delay` 0 disables hedging.
+    """
+    tasks = [asyncio.ensure_future(make_call())]
+    try:
+        if not delay:
+            return await tasks[0]
+
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            HEDGED.labels(stage=stage, outcome="launched").inc()
+            tasks.append(asyncio.ensure_future(make_call()))
+
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        HEDGED.labels(stage=stage, outcome="won").inc()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
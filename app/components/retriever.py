@@ -1,18 +1,166 @@
+import hashlib
 import traceback
 from typing import Optional
 from app.components.bedrock_retriever import get_bedrock_retriever
 
+from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
 from app.components.llm import load_llm
 from app.components.vector_store import load_vector_store
+from app.components.context_budget import assemble_context
+from app.components.reranker import get_reranker, rerank_documents
+from app.components.prefetch import prefetching_retriever, set_prefetch_retriever
+from app.components.cache import cache_namespace
+from app.components.digests import corpus_version
+from app.components.resilience import CircuitBreaker, FALLBACKS, hedged, with_deadline
+from app.config.config import (
+    RERANK_ENABLED,
+    CACHE_TTL_RETRIEVAL,
+    RETRIEVAL_TIMEOUT,
+    RETRIEVAL_SLOW_CALL,
+    RETRIEVAL_HEDGE_DELAY,
+    LLM_TIMEOUT,
+    LLM_SLOW_CALL,
+    FALLBACK_RETRIEVAL_K,
+)
 from app.common.logger import get_logger
 from app.common.custom_exception import CustomException
+from app.common.tracing import span
 
 logger = get_logger(__name__)
 
+# One per process, shared by every chain built in it
+_retrieval_breaker = CircuitBreaker("retrieval", RETRIEVAL_SLOW_CALL)
+_llm_breaker = CircuitBreaker("llm", LLM_SLOW_CALL)
+
+
+def _timed(name, runnable, operation=None):
+    """Wrap a runnable so its calls are timed as a `name` span on the request."""
+    operation = operation or type(runnable).__name__
+
+    def invoke(value, config):
+        with span(name, operation):
+            return runnable.invoke(value, config)
+
+    async def ainvoke(value, config):
+        with span(name, operation):
+            return await runnable.ainvoke(value, config)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=name)
+
+
+def _guarded_llm(llm):
+    """Generation under LLM_TIMEOUT and the "llm" breaker; failures go to run_qa's fallback."""
+    def invoke(value, config):
+        return _llm_breaker.call(llm.invoke, value, config)
+
+    async def ainvoke(value, config):
+        return await _llm_breaker.acall(lambda: with_deadline("llm", LLM_TIMEOUT, llm.ainvoke(value, config)))
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="guarded_llm")
+
+
+def _guarded_retriever(retriever, vector_store=None):
+    """
+    Knowledge Base retrieval under RETRIEVAL_TIMEOUT, hedged after
+    RETRIEVAL_HEDGE_DELAY and behind the "retrieval" breaker. When it fails
+    or the breaker is open, the local FAISS index answers instead (if one was
+    loaded); its documents are tagged so they aren't cached.
+    """
+    fallback = None
+    if vector_store is not None:
+        fallback = vector_store.as_retriever(search_kwargs={"k": FALLBACK_RETRIEVAL_K})
+
+    def falling_back(error):
+        if fallback is None:
+            return False
+        logger.warning("Knowledge Base retrieval unavailable (%s), using local FAISS", error)
+        FALLBACKS.labels(stage="retrieval", fallback="faiss").inc()
+        return True
+
+    def tag(docs):
+        # Copies: FAISS hands out the Documents held in its docstore
+        return [Document(page_content=d.page_content, metadata={**d.metadata, "retrieval_fallback": "faiss"}) for d in docs]
+
+    def invoke(query, config):
+        try:
+            return _retrieval_breaker.call(retriever.invoke, query, config)
+        except Exception as e:
+            if not falling_back(e):
+                raise
+        with span("retrieval_fallback", "FAISS"):
+            return tag(fallback.invoke(query, config))
+
+    async def ainvoke(query, config):
+        def attempt():
+            return retriever.ainvoke(query, config)
+
+        try:
+            return await _retrieval_breaker.acall(
+                lambda: with_deadline("retrieval", RETRIEVAL_TIMEOUT, hedged("retrieval", attempt, RETRIEVAL_HEDGE_DELAY))
+            )
+        except Exception as e:
+            if not falling_back(e):
+                raise
+        with span("retrieval_fallback", "FAISS"):
+            return tag(await fallback.ainvoke(query, config))
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="guarded_retriever")
+
+
+def _cached(retriever):
+    """
+    Serve repeated queries from the shared retrieval cache. Keys include the
+    data/pdfs hash, which tracks the local index; the Knowledge Base syncs
+    its own copy, so its updates show once entries expire (CACHE_TTL_RETRIEVAL).
+    """
+    cache = cache_namespace("retrieval", CACHE_TTL_RETRIEVAL)
+    if not cache.enabled:
+        return retriever
+
+    def key(query):
+        return hashlib.sha256(f"{corpus_version()}\0{query}".encode()).hexdigest()
+
+    def dump(docs):
+        return [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+
+    def load(payload):
+        return [Document(**d) for d in payload]
+
+    def cacheable(docs):
+        return not any(d.metadata.get("retrieval_fallback") for d in docs)
+
+    def invoke(query, config):
+        hit = cache.get(key(query))
+        if hit is not None:
+            return load(hit)
+        docs = retriever.invoke(query, config)
+        if cacheable(docs):
+            cache.set(key(query), dump(docs))
+        return docs
+
+    async def ainvoke(query, config):
+        hit = await cache.aget(key(query))
+        if hit is not None:
+            return load(hit)
+        docs = await retriever.ainvoke(query, config)
+        if cacheable(docs):
+            await cache.aset(key(query), dump(docs))
+        return docs
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="cached_retriever")
+
+
+def _rerank(x):
+    # Score against the bare question when the caller passes it; the
+    # "input" also carries the profile block
+    with span("rerank", "CrossEncoder"):
+        return rerank_documents(x.get("question") or x["input"], x["docs"])
+
 
 def set_custom_prompt():
     return PromptTemplate(
@@ -50,21 +198,52 @@ FINAL ANSWER:
     )
 
 
-def create_qa_chain():
+def create_context_retriever(retriever, vector_store=None, rerank=RERANK_ENABLED, cached=True, prefetch=False):
+    """
+    The chain's retrieval step: takes the chain input dict and returns the
+    documents that go into the prompt. `retriever` is any LangChain
+    retriever taking the query string. With `prefetch`, profile saves
+    prefetch through this step's retriever.
+    """
+    # A pending prefetch for the user or a cached result for the same query
+    # stands in for the retriever call
+    base = _guarded_retriever(retriever, vector_store)
+    if cached:
+        base = _cached(base)
+    if prefetch:
+        set_prefetch_retriever(base)
+    retrieve = _timed("retrieval", prefetching_retriever(base), type(retriever).__name__)
+
+    # Retrieved chunks are (optionally) reranked, then deduplicated and
+    # trimmed to the token budget before the stuff chain pastes them
+    # into the prompt.
+    if rerank:
+        get_reranker()  # load the model during warm-up, not on the first question
+        retrieve = RunnablePassthrough.assign(docs=retrieve) | RunnableLambda(_rerank)
+    return retrieve | RunnableLambda(assemble_context)
+
+
+def create_qa_chain(vector_store=None, retriever=None, prefetch=False):
+    """
+    Build the retrieval + generation chain, over the Bedrock Knowledge Base
+    unless another `retriever` is given. `vector_store` (the local FAISS
+    index) serves retrieval while the retriever is failing. Pass `prefetch`
+    for the serving chain so profile saves prefetch through it.
+    """
     try:
-        logger.info("Creating QA chain (Bedrock KB)")
+        retriever = retriever or get_bedrock_retriever()
+        logger.info("Creating QA chain (%s)", type(retriever).__name__)
 
         llm = load_llm()
-        retriever = get_bedrock_retriever()
         prompt = set_custom_prompt()
 
         doc_chain = create_stuff_documents_chain(
-            llm=llm,
+            llm=_timed("llm", _guarded_llm(llm), type(llm).__name__),
             prompt=prompt
         )
 
         qa_chain = create_retrieval_chain(
-            retriever=retriever,
+            retriever=create_context_retriever(retriever, vector_store, prefetch=prefetch),
             combine_docs_chain=doc_chain
         )
 
@@ -74,6 +253,3 @@ def create_qa_chain():
     except Exception as e:
         logger.exception("Failed to create QA chain")
         raise
-
-
-
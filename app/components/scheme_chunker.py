@@ -0,0 +1,144 @@
+import re
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from app.common.logger import get_logger
+from app.components.context_budget import estimate_tokens
+from app.config.config import CHUNK_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS
+
+logger = get_logger(__name__)
+
+_NUMBERED_RE = re.compile(r"^\s*(?:\d{1,3}|[IVXivx]{1,5}|[A-Za-z])[\.\)]\s+(?=\S)")
+_SCHEME_LABEL_RE = re.compile(r"^\s*(?:name of (?:the )?scheme|scheme name|scheme)\s*[:\-–]\s*(.+)$", re.I)
+_SCHEME_WORD_RE = re.compile(
+    r"\b(?:scheme|yojana|yojna|scholarship|abhiyan|mission|programme|program|protsahan|"
+    r"kalyan|vikas|nidhi|fellowship|award)s?\b",
+    re.I,
+)
+# Field headings inside a scheme entry; never treated as a new scheme
+_FIELD_RE = re.compile(
+    r"^\s*(?:\d{1,3}[\.\)]\s*)?(?:eligibility|eligible|benefits?|documents?|how to apply|application|"
+    r"objective|amount|assistance|contact|note|important|last date|selection|process|website|"
+    r"required|criteria|features|details|overview|introduction|income|age)\b",
+    re.I,
+)
+_MAX_HEADING_CHARS = 120
+
+
+def scheme_heading(line: str):
+    """
+    Return the scheme name if `line` starts a new scheme entry, else None.
+
+    Boundaries are "Scheme Name: ..." labels, and short lines that are
+    numbered, all-caps or name a scheme (Scheme, Yojana, Scholarship, ...)
+    without reading like a sentence. Field headings such as "Eligibility" or
+    "Documents Required" stay inside the current scheme.
+    """
+    text = line.strip()
+    if not text or len(text) > _MAX_HEADING_CHARS:
+        return None
+
+    label = _SCHEME_LABEL_RE.match(text)
+    if label:
+        return label.group(1).strip(" :-–")
+
+    if _FIELD_RE.match(text):
+        return None
+
+    name = _NUMBERED_RE.sub("", text).strip(" :-–")
+    letters = [c for c in name if c.isalpha()]
+    if len(letters) < 4 or text.endswith((".", ",", ";")):
+        return None
+
+    numbered = name != text.strip(" :-–")
+    all_caps = all(c.isupper() for c in letters)
+    names_scheme = bool(_SCHEME_WORD_RE.search(name)) and len(name.split()) <= 14
+    if names_scheme and (numbered or all_caps or name.istitle() or text.endswith(":")):
+        return name
+    if all_caps and len(name.split()) <= 10:
+        return name
+    return None
+
+
+def _sections(pages):
+    """Split one source's pages into (scheme_name, text, metadata) sections at scheme headings."""
+    sections = []
+    name, lines, metadata = None, [], pages[0].metadata
+
+    for page in pages:
+        for line in page.page_content.splitlines():
+            heading = scheme_heading(line)
+            if heading is not None:
+                if lines:
+                    sections.append((name, "\n".join(lines).strip(), metadata))
+                name, lines, metadata = heading, [], page.metadata
+            lines.append(line)
+    if lines:
+        sections.append((name, "\n".join(lines).strip(), metadata))
+
+    # A heading with (almost) nothing under it, e.g. a document title or a
+    # heading at the foot of a page, is folded into the section that follows.
+    merged = []
+    carry = ""
+    for name, text, metadata in sections:
+        if not text:
+            continue
+        if carry:
+            text = f"{carry}\n{text}"
+            carry = ""
+        if estimate_tokens(text) < CHUNK_MIN_TOKENS:
+            carry = text
+            continue
+        merged.append((name, text, metadata))
+    if carry:
+        if merged:
+            name, text, metadata = merged[-1]
+            merged[-1] = (name, f"{text}\n{carry}", metadata)
+        else:
+            merged.append((sections[-1][0], carry, sections[-1][2]))
+    return merged
+
+
+def chunk_by_scheme(documents, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+    """
+    Structural chunker: one chunk per scheme entry, sized by tokens.
+
+    Pages of the same source are read in order so an entry that runs across
+    a page break stays together. An entry longer than `max_tokens` is split
+    on paragraph/line/sentence boundaries and every part is prefixed with the
+    scheme name so it still embeds as that scheme. Each chunk carries
+    `scheme_name` (None before the first heading) plus the metadata of the
+    page the entry starts on.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=max_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=estimate_tokens,
+        separators=["\n\n", "\n", ". ", " "],
+    )
+
+    by_source = {}
+    for doc in documents:
+        by_source.setdefault(doc.metadata.get("source"), []).append(doc)
+
+    chunks = []
+    for pages in by_source.values():
+        for name, text, metadata in _sections(pages):
+            metadata = {**metadata, "scheme_name": name}
+            if estimate_tokens(text) <= max_tokens:
+                chunks.append(Document(page_content=text, metadata=metadata))
+                continue
+
+            parts = splitter.split_text(text)
+            for i, part in enumerate(parts):
+                if i and name and not part.startswith(name):
+                    part = f"{name} (continued)\n{part}"
+                chunks.append(Document(
+                    page_content=part,
+                    metadata={**metadata, "chunk_part": i + 1, "chunk_parts": len(parts)},
+                ))
+
+    named = sum(1 for c in chunks if c.metadata["scheme_name"])
+    logger.info("Scheme chunker: %d chunks from %d sources, %d tagged with a scheme", len(chunks), len(by_source), named)
+    return chunks
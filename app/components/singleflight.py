@@ -0,0 +1,122 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.common.logger import get_logger
+from app.common.metrics import Counter
+
+logger = get_logger(__name__)
+
+COALESCED = Counter(
+    "singleflight_coalesced_total",
+    "Calls that shared another caller's in-flight result",
+    ["group", "scope"],
+)
+
+
+class FileLockStore:
+    """
+    Node-local lock + result store so uvicorn workers on the same machine can
+    coalesce too: one worker holds an flock on the key while computing and
+    leaves the result behind for `result_ttl` seconds for the others.
+    """
+
+    def __init__(self, directory: str, result_ttl: float = 30.0, poll_interval: float = 0.05):
+        self.directory = directory
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{suffix}")
+
+    def try_lock(self, key: str) -> Optional[int]:
+        fd = os.open(self._path(key, "lock"), os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except BlockingIOError:
+            os.close(fd)
+            return None
+
+    @staticmethod
+    def unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def read_result(self, key: str):
+        path = self._path(key, "json")
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_result(self, key: str, value):
+        path = self._path(key, "json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(value, f, default=str)
+        os.replace(tmp, path)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    Within a worker, later callers await the first caller's task. With a
+    FileLockStore, callers in other workers wait on the key's lock and reuse
+    the stored result; values must then be JSON-serialisable.
+    """
+
+    def __init__(self, group: str, store: Optional[FileLockStore] = None, max_wait: float = 120.0):
+        self.group = group
+        self.store = store
+        self.max_wait = max_wait
+        self._inflight = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is not None:
+            COALESCED.labels(group=self.group, scope="worker").inc()
+        else:
+            # Run in its own task so a cancelled leader does not strand followers
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _run(self, key, fn):
+        if self.store is None:
+            return await fn()
+
+        deadline = time.monotonic() + self.max_wait
+        waited = False
+        while True:
+            fd = self.store.try_lock(key)
+            if fd is not None:
+                break
+            if time.monotonic() > deadline:
+                logger.warning("Single-flight wait timed out for group %s", self.group)
+                return await fn()
+            waited = True
+            await asyncio.sleep(self.store.poll_interval)
+
+        try:
+            if waited:
+                cached = self.store.read_result(key)
+                if cached is not None:
+                    COALESCED.labels(group=self.group, scope="node").inc()
+                    return cached
+            result = await fn()
+            self.store.write_result(key, result)
+            return result
+        finally:
+            self.store.unlock(fd)
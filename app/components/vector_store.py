@@ -31,20 +31,20 @@ def load_vector_store():
         error_message = CustomException("Failed to load vectorstore" , e)
         logger.error(str(error_message))
 
-def save_vector_store(text_chunks):
+def save_vector_store(text_chunks, embedding_model=None, path=DB_FAISS_PATH):
     try:
         if not text_chunks:
             raise CustomException("No chunks were found..")      
         logger.info("Generating your new vectorstore")
 
-        embedding_model = get_embedding_model()
+        embedding_model = embedding_model or get_embedding_model()
 
         db = FAISS.from_documents(text_chunks,embedding_model)
 
         logger.info("Saving vectorstoree")
 
-        os.makedirs(DB_FAISS_PATH, exist_ok=True)
-        db.save_local(DB_FAISS_PATH)
+        os.makedirs(path, exist_ok=True)
+        db.save_local(path)
 
         logger.info("Vectostore saved sucesfulyy...")
 
@@ -8,9 +8,190 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 HF_TOKEN = os.environ.get("HF_TOKEN")
 BEDROCK_EMBEDDING_ID = os.getenv("BEDROCK_EMBEDDING_ID")
 
+# Embeddings for the local FAISS index: "bedrock" (Titan) or "local"
+# (sentence-transformers on CPU, app/components/local_embeddings.py).
+# The index must be rebuilt after switching, as the vectors differ.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "bedrock").lower()
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_RUNTIME = os.getenv("LOCAL_EMBEDDING_RUNTIME", "onnx").lower()
+LOCAL_EMBEDDING_ONNX_FILE = os.getenv("LOCAL_EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", 0))  # 0 = runtime default
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", 64))
+
 
 DB_FAISS_PATH = os.path.join(BASE_DIR, "vectorstore", "db_faiss")
 DATA_PATH = os.path.join(BASE_DIR, "data", "pdfs")
 
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
+
+# "scheme" splits at scheme headings and sizes chunks in tokens
+# (app/components/scheme_chunker.py); "recursive" is the fixed-size
+# character splitter using CHUNK_SIZE / CHUNK_OVERLAP.
+CHUNKER = os.getenv("CHUNKER", "scheme").lower()
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", 512))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", 40))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 40))
+
+# Prompt assembly
+PROFILE_CONTEXT_CACHE_SIZE = int(os.getenv("PROFILE_CONTEXT_CACHE_SIZE", 1024))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", 0.8))
+
+# Optional CPU cross-encoder reranking of retrieved chunks. ms-marco
+# cross-encoders output logits, so a threshold of 0 is roughly even odds.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_THRESHOLD = float(os.getenv("RERANK_THRESHOLD", 0.0))
+RERANK_MIN_KEEP = int(os.getenv("RERANK_MIN_KEEP", 1))
+RERANK_MAX_KEEP = int(os.getenv("RERANK_MAX_KEEP", 3))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 16))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", 512))
+
+# "aws" talks to Bedrock; "fake" swaps in the local stand-ins from
+# app/components/fake_bedrock.py (load testing, offline development).
+BEDROCK_BACKEND = os.getenv("BEDROCK_BACKEND", "aws").lower()
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "lognormal:1500:0.4")
+FAKE_LLM_OUTPUT_TOKENS = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", 250))
+FAKE_EMBEDDING_LATENCY = os.getenv("FAKE_EMBEDDING_LATENCY", "fixed:20")
+FAKE_KB_LATENCY = os.getenv("FAKE_KB_LATENCY", "lognormal:300:0.3")
+FAKE_KB_RESULTS = int(os.getenv("FAKE_KB_RESULTS", 6))
+
+# Warm the OCR model in the background at startup (otherwise on first upload)
+OCR_WARMUP = os.getenv("OCR_WARMUP", "false").lower() in ("1", "true", "yes")
+
+# When set, OCR is delegated to the shared sidecar listening on this Unix
+# socket (python -m app.documents.ocr_server) instead of a per-worker model.
+OCR_SOCKET = os.getenv("OCR_SOCKET")
+OCR_SOCKET_TIMEOUT = float(os.getenv("OCR_SOCKET_TIMEOUT", 120))
+
+# OCR languages (easyocr codes joined with "+", or "mixed") per upload
+# doc_type, as "doc_type=langs,..."; "*" is the default and its reader is
+# the one loaded at startup. There is no script detection: "mixed" is just
+# the OCR_MIXED_LANGS reader (Devanagari models also read Latin script) for
+# documents that may be in either. Marksheets default to English so the
+# common upload only needs the small English reader. Loaded readers are
+# kept within OCR_POOL_BUDGET_MB of model weights per process (least
+# recently used evicted); OCR_READER_ESTIMATE_MB sizes a reader whose
+# weights can't be measured.
+OCR_DEFAULT_LANGS = os.getenv("OCR_DEFAULT_LANGS", "en")
+OCR_LANGS_BY_DOC_TYPE = dict(
+    item.strip().split("=", 1)
+    for item in os.getenv(
+        "OCR_LANGS_BY_DOC_TYPE",
+        "income_certificate=hi+en,caste_certificate=hi+en,domicile_certificate=hi+en,*=en",
+    ).split(",")
+    if "=" in item
+)
+OCR_MIXED_LANGS = os.getenv("OCR_MIXED_LANGS", "hi+en")
+OCR_POOL_BUDGET_MB = float(os.getenv("OCR_POOL_BUDGET_MB", 1024))
+OCR_READER_ESTIMATE_MB = float(os.getenv("OCR_READER_ESTIMATE_MB", 400))
+
+# Document storage (app/storage/). Uploads are stored once per content hash
+# and reference-counted; the GC removes unreferenced objects older than
+# STORAGE_GC_GRACE seconds every STORAGE_GC_INTERVAL seconds (0 disables).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", os.path.join(BASE_DIR, "storage"))
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+STORAGE_GC_INTERVAL = float(os.getenv("STORAGE_GC_INTERVAL", 3600))
+STORAGE_GC_GRACE = float(os.getenv("STORAGE_GC_GRACE", 3600))
+# Only the worker holding the flock here runs the periodic GC. The lock is
+# node-local: with several nodes, set STORAGE_GC_INTERVAL=0 on the servers
+# and run `python -m app.storage.blobs` from one scheduler instead.
+STORAGE_GC_LOCK_DIR = os.getenv("STORAGE_GC_LOCK_DIR", os.path.join(BASE_DIR, "locks"))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", 256))
+
+# Precomputed answers to the generic eligibility question per profile
+# bucket (app/components/digests.py)
+DIGEST_STATES = [s.strip() for s in os.getenv("DIGEST_STATES", "Bihar,Uttar Pradesh,Madhya Pradesh,Jharkhand").split(",") if s.strip()]
+DIGEST_CONCURRENCY = int(os.getenv("DIGEST_CONCURRENCY", 4))
+DIGEST_REBUILD_ON_INGEST = os.getenv("DIGEST_REBUILD_ON_INGEST", "true").lower() not in ("0", "false", "no")
+
+# Shared cache for answers, retrievals and embeddings (app/components/cache.py):
+# "memory" (per worker), "sqlite" (per node) or "redis" (shared). A TTL of 0
+# disables that layer's cache. Each namespace has its own size bound in MB,
+# as "namespace=mb,..." ("*" for any other), so bulk embedding writes at
+# ingestion can't evict answers; redis uses its own maxmemory policy instead.
+# Answer and retrieval keys include the data/pdfs hash, but a Knowledge Base
+# re-sync is only picked up as entries expire, so keep those TTLs short.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_MAX_MB = {
+    name: float(mb)
+    for name, mb in (
+        item.strip().split("=", 1)
+        for item in os.getenv("CACHE_MAX_MB", "qa=64,qa_fallback=32,retrieval=64,embedding=96,*=32").split(",")
+        if "=" in item
+    )
+}
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", os.path.join(BASE_DIR, "cache", "cache.sqlite3"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_TTL_QA = float(os.getenv("CACHE_TTL_QA", 300))
+CACHE_TTL_RETRIEVAL = float(os.getenv("CACHE_TTL_RETRIEVAL", 600))
+CACHE_TTL_EMBEDDING = float(os.getenv("CACHE_TTL_EMBEDDING", 7 * 24 * 3600))
+
+# Speculative retrieval prefetch after profile saves (app/components/prefetch.py)
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() not in ("0", "false", "no")
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", 300))
+PREFETCH_MAX_USERS = int(os.getenv("PREFETCH_MAX_USERS", 10000))
+
+# /api/export: documents fetched per cursor batch, messages per $slice page
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 200))
+
+# Marksheet re-parse job (python -m app.documents.reparse): documents per
+# cursor batch / bulk write, parser processes (0 = CPU count)
+REPARSE_BATCH_SIZE = int(os.getenv("REPARSE_BATCH_SIZE", 500))
+REPARSE_WORKERS = int(os.getenv("REPARSE_WORKERS", 0))
+
+# PDF uploads (app/documents/pdf.py): pages with at least PDF_MIN_TEXT_CHARS
+# of text layer skip OCR; the rest are rendered at PDF_RENDER_SCALE x 72 dpi
+# and OCR'd with up to PDF_OCR_CONCURRENCY pages in flight.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 20))
+PDF_MIN_TEXT_CHARS = int(os.getenv("PDF_MIN_TEXT_CHARS", 20))
+PDF_RENDER_SCALE = float(os.getenv("PDF_RENDER_SCALE", 2.0))
+PDF_OCR_CONCURRENCY = int(os.getenv("PDF_OCR_CONCURRENCY", 2))
+
+# Coalesce identical in-flight QA requests. Set QA_COALESCE_DIR to a node-local
+# directory to also coalesce across uvicorn workers.
+QA_COALESCE_DIR = os.getenv("QA_COALESCE_DIR")
+QA_COALESCE_RESULT_TTL = float(os.getenv("QA_COALESCE_RESULT_TTL", 30))
+
+# Admission control for QA chain (Bedrock) calls, per worker
+QA_MAX_CONCURRENT = int(os.getenv("QA_MAX_CONCURRENT", 8))
+QA_MAX_QUEUE = int(os.getenv("QA_MAX_QUEUE", 32))
+QA_MAX_QUEUE_WAIT = float(os.getenv("QA_MAX_QUEUE_WAIT", 10))
+QA_MAX_PER_USER = int(os.getenv("QA_MAX_PER_USER", 2))
+
+# Per-stage deadlines and circuit breakers for Bedrock calls
+# (app/components/resilience.py). A call slower than the stage's *_SLOW_CALL
+# counts as a failure for its breaker; retrieval is hedged with a second
+# request after RETRIEVAL_HEDGE_DELAY seconds (0 disables). While a breaker
+# is open, retrieval falls back to the local FAISS index and generation to
+# the last good answer kept for CACHE_TTL_QA_FALLBACK seconds.
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", 5))
+RETRIEVAL_SLOW_CALL = float(os.getenv("RETRIEVAL_SLOW_CALL", 2))
+RETRIEVAL_HEDGE_DELAY = float(os.getenv("RETRIEVAL_HEDGE_DELAY", 0.8))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 45))
+LLM_SLOW_CALL = float(os.getenv("LLM_SLOW_CALL", 20))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", 10))
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", 60))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", 30))
+FALLBACK_RETRIEVAL_K = int(os.getenv("FALLBACK_RETRIEVAL_K", 6))
+CACHE_TTL_QA_FALLBACK = float(os.getenv("CACHE_TTL_QA_FALLBACK", 7 * 24 * 3600))
+
+# Shared AWS clients (app/components/aws_clients.py)
+AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", 50))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", 3))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", 60))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", 4))
+
+# Near-duplicate chunk elimination at ingestion (MinHash + LSH)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() not in ("0", "false", "no")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 16
+DEDUP_SHINGLE_SIZE = 5
@@ -0,0 +1,256 @@
+"""
+In-memory stand-in for the subset of the Motor API this app uses.
+Selected with MONGO_URI=memory:// for load tests and offline development;
+data lives for the lifetime of the process only.
+"""
+import copy
+import re
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+_MISSING = object()
+
+
+def _get(doc, dotted):
+    value = doc
+    for part in dotted.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _match_value(value, cond):
+    if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+        # As in MongoDB, null in an $in/$nin list also matches a missing field
+        present = None if value is _MISSING else value
+        for op, arg in cond.items():
+            if op == "$in" and present not in arg:
+                return False
+            if op == "$nin" and present in arg:
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$exists" and (value is not _MISSING) != bool(arg):
+                return False
+            if op == "$regex":
+                flags = re.IGNORECASE if "i" in cond.get("$options", "") else 0
+                if not isinstance(value, str) or not re.search(arg, value, flags):
+                    return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is _MISSING or value is None:
+                    return False
+                if op == "$gt" and not value > arg:
+                    return False
+                if op == "$gte" and not value >= arg:
+                    return False
+                if op == "$lt" and not value < arg:
+                    return False
+                if op == "$lte" and not value <= arg:
+                    return False
+        return True
+    if cond is None:
+        # As in MongoDB, {field: null} also matches a missing field
+        return value is _MISSING or value is None
+    if isinstance(value, list) and not isinstance(cond, list):
+        return cond in value
+    return value == cond
+
+
+def _matches(doc, filter_):
+    return all(_match_value(_get(doc, k), v) for k, v in (filter_ or {}).items())
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    slices = {k: v["$slice"] for k, v in projection.items() if isinstance(v, dict) and "$slice" in v}
+    if slices:
+        # {"field": {"$slice": [skip, limit]}} trims an array, keeping the other fields
+        out = _project(doc, {k: v for k, v in projection.items() if k not in slices})
+        for k, arg in slices.items():
+            skip, limit = arg if isinstance(arg, list) else (0, arg)
+            out[k] = copy.deepcopy(doc.get(k, [])[skip:skip + limit])
+        return out
+    include = {k for k, v in projection.items() if v}
+    exclude = {k for k, v in projection.items() if not v}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if "_id" not in exclude and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k not in exclude}
+
+
+def _pull_matches(item, cond):
+    # {"$pull": {"documents": {"doc_id": x}}} matches array sub-documents by query
+    if isinstance(item, dict) and isinstance(cond, dict) and not any(k.startswith("$") for k in cond):
+        return _matches(item, cond)
+    return _match_value(item, cond)
+
+
+def _apply_update(doc, update, inserting=False):
+    for op, fields in update.items():
+        for key, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                doc[key] = copy.deepcopy(value)
+            elif op == "$unset":
+                doc.pop(key, None)
+            elif op == "$inc":
+                doc[key] = doc.get(key, 0) + value
+            elif op == "$push":
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                doc.setdefault(key, []).extend(copy.deepcopy(items))
+            elif op == "$pull":
+                doc[key] = [v for v in doc.get(key, []) if not _pull_matches(v, value)]
+
+
+def _sort_key(value):
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value))
+
+
+class MemoryCursor:
+    def __init__(self, docs, projection=None):
+        self._docs = docs
+        self._projection = projection
+        self._skip = 0
+        self._limit = None
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for k, d in reversed(keys):
+            self._docs.sort(key=lambda doc: _sort_key(_get(doc, k)), reverse=d < 0)
+        return self
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n or None
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def _selected(self):
+        docs = self._docs[self._skip:]
+        if self._limit is not None:
+            docs = docs[: self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length=None):
+        docs = self._selected()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._selected())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryCollection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = []
+
+    async def find_one(self, filter_=None, projection=None):
+        for doc in self._docs:
+            if _matches(doc, filter_):
+                return _project(doc, projection)
+        return None
+
+    def find(self, filter_=None, projection=None):
+        return MemoryCursor([d for d in self._docs if _matches(d, filter_)], projection)
+
+    async def count_documents(self, filter_=None):
+        return sum(1 for d in self._docs if _matches(d, filter_))
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self._docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs):
+        ids = [(await self.insert_one(d)).inserted_id for d in docs]
+        return SimpleNamespace(inserted_ids=ids)
+
+    async def update_one(self, filter_, update, upsert=False):
+        for doc in self._docs:
+            if _matches(doc, filter_):
+                before = copy.deepcopy(doc)
+                _apply_update(doc, update)
+                return SimpleNamespace(matched_count=1, modified_count=int(before != doc), upserted_id=None)
+        if upsert:
+            doc = {k: v for k, v in (filter_ or {}).items() if not isinstance(v, dict)}
+            doc["_id"] = doc.get("_id", ObjectId())
+            _apply_update(doc, update, inserting=True)
+            self._docs.append(doc)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, filter_, update):
+        count = 0
+        for doc in self._docs:
+            if _matches(doc, filter_):
+                _apply_update(doc, update)
+                count += 1
+        return SimpleNamespace(matched_count=count, modified_count=count)
+
+    async def bulk_write(self, requests, ordered=True):
+        """Apply pymongo UpdateOne/UpdateMany requests in order."""
+        matched = modified = upserted = 0
+        for op in requests:
+            if type(op).__name__ == "UpdateMany":
+                res = await self.update_many(op._filter, op._doc)
+            else:
+                res = await self.update_one(op._filter, op._doc, upsert=bool(op._upsert))
+                upserted += res.upserted_id is not None
+            matched += res.matched_count
+            modified += res.modified_count
+        return SimpleNamespace(matched_count=matched, modified_count=modified, upserted_count=upserted)
+
+    async def delete_one(self, filter_):
+        for i, doc in enumerate(self._docs):
+            if _matches(doc, filter_):
+                del self._docs[i]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def delete_many(self, filter_):
+        before = len(self._docs)
+        self._docs = [d for d in self._docs if not _matches(d, filter_)]
+        return SimpleNamespace(deleted_count=before - len(self._docs))
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+
+class MemoryClient:
+    def __init__(self, uri=None):
+        self._databases = {}
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase()
+        return self._databases[name]
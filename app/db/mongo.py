@@ -2,10 +2,19 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGO_URI)
+
+if MONGO_URI.startswith("memory://"):
+    # In-process stand-in for load tests and offline development
+    from app.db.memory import MemoryClient
+    client = MemoryClient(MONGO_URI)
+else:
+    client = AsyncIOMotorClient(MONGO_URI)
 
 db = client["govt_scheme_finder"]
 users_col = db["users"]
 profiles_col = db["profiles"]
 chats_col = db["chats"]
 documents_col = db["documents"]
+blobs_col = db["blobs"]
+digests_col = db["digests"]
+jobs_col = db["jobs"]
@@ -1,11 +1,207 @@
-import easyocr
-from functools import lru_cache
+"""
+OCR for uploaded images, in-process or through the shared sidecar.
 
-@lru_cache(maxsize=1)
-def get_reader():
-    return easyocr.Reader(["en"], gpu=False)
+Readers are per language set (easyocr loads one recognition model per
+script) and live in a pool that loads them on first use and keeps them
+within OCR_POOL_BUDGET_MB, evicting the least recently used one. English
+stays cheap; Hindi/Devanagari is only paid for by workers that see it.
 
-def extract_text(image_path: str) -> str:
-    reader = get_reader()
-    results = reader.readtext(image_path)
-    return " ".join(text for (_, text, _) in results)
+Languages come from the document type (OCR_LANGS_BY_DOC_TYPE); the script
+is not detected. "mixed" names the OCR_MIXED_LANGS reader for documents that
+may be in Hindi or English: each easyocr reader carries its own detector
+model, so trying English first and Hindi second would hold two readers on
+any worker that sees one poor scan, while the hi+en reader reads Latin
+script as well.
+"""
+import gc
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from app.common.logger import get_logger
+from app.common.tracing import timed
+from app.common.metrics import INFLIGHT_JOBS, Counter, Gauge
+from app.config.config import (
+    OCR_SOCKET,
+    OCR_SOCKET_TIMEOUT,
+    OCR_DEFAULT_LANGS,
+    OCR_LANGS_BY_DOC_TYPE,
+    OCR_MIXED_LANGS,
+    OCR_POOL_BUDGET_MB,
+    OCR_READER_ESTIMATE_MB,
+)
+
+logger = get_logger(__name__)
+
+READER_LOADS = Counter("ocr_reader_loads_total", "OCR readers loaded", ["langs"])
+READER_EVICTIONS = Counter("ocr_reader_evictions_total", "OCR readers evicted to stay within budget", ["langs"])
+POOL_MB = Gauge("ocr_reader_pool_mb", "Model weights held by loaded OCR readers (approximate memory)")
+
+MIXED = "mixed"
+
+
+def parse_langs(value) -> tuple:
+    """Normalise "hi+en" or ["hi", "en"] to ("en", "hi"); MIXED is OCR_MIXED_LANGS."""
+    if value == MIXED:
+        value = OCR_MIXED_LANGS
+    if isinstance(value, str):
+        value = value.split("+")
+    return tuple(sorted({lang.strip() for lang in value if lang.strip()})) or parse_langs(OCR_DEFAULT_LANGS)
+
+
+def langs_for_doc_type(doc_type) -> tuple:
+    """OCR languages for an upload of `doc_type` ("*" for the default)."""
+    mapping = OCR_LANGS_BY_DOC_TYPE
+    langs = mapping.get(str(doc_type or "").lower(), mapping.get("*", OCR_DEFAULT_LANGS))
+    return parse_langs(langs)
+
+
+def _model_mb(reader) -> float:
+    """Size of a reader's detector + recognizer weights; 0 if they can't be measured."""
+    total = 0
+    for model in (getattr(reader, "detector", None), getattr(reader, "recognizer", None)):
+        parameters = getattr(model, "parameters", None)
+        if callable(parameters):
+            total += sum(p.numel() * p.element_size() for p in parameters())
+    return total / (1024 * 1024)
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+class ReaderPool:
+    """
+    Lazily loaded easyocr readers keyed by language set, LRU-evicted to stay
+    within `budget_mb`. A reader's size is its model weights (`estimate_mb`
+    before it has been loaded once, or if they can't be measured), so the
+    budget is approximate: inference buffers aren't counted, and memory
+    freed by an eviction goes back to the allocator, which may not return it
+    to the OS. A reader evicted while another thread is still reading with
+    it is freed when that read ends.
+    """
+
+    def __init__(self, budget_mb: float, estimate_mb: float):
+        self.budget_mb = budget_mb
+        self.estimate_mb = estimate_mb
+        self._readers = OrderedDict()  # langs -> reader, least recent first
+        self._sizes = {}  # langs -> measured MB, kept across evictions
+        self._lock = threading.Lock()
+        self._loading = {}  # langs -> Lock, so each set loads once
+        POOL_MB.set_function(self.used_mb)
+
+    def used_mb(self) -> float:
+        return sum(self._sizes.get(langs, self.estimate_mb) for langs in list(self._readers))
+
+    def _evict_for(self, needed_mb: float):
+        while self._readers and self.used_mb() + needed_mb > self.budget_mb:
+            langs, _ = self._readers.popitem(last=False)
+            READER_EVICTIONS.labels(langs="+".join(langs)).inc()
+            logger.info("Evicted OCR reader %s", "+".join(langs))
+        gc.collect()
+
+    def get(self, langs: tuple):
+        with self._lock:
+            reader = self._readers.get(langs)
+            if reader is not None:
+                self._readers.move_to_end(langs)
+                return reader
+            load_lock = self._loading.setdefault(langs, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                reader = self._readers.get(langs)
+                if reader is not None:
+                    return reader
+                self._evict_for(self._sizes.get(langs, self.estimate_mb))
+
+            # easyocr pulls in torch; import it only on workers that actually OCR
+            import easyocr
+
+            started = time.perf_counter()
+            reader = easyocr.Reader(list(langs), gpu=False)
+            size = _model_mb(reader) or self.estimate_mb
+            READER_LOADS.labels(langs="+".join(langs)).inc()
+            logger.info(
+                "Loaded OCR reader %s in %.1f s (~%.0f MB)", "+".join(langs), time.perf_counter() - started, size,
+            )
+
+            with self._lock:
+                self._sizes[langs] = size
+                self._readers[langs] = reader
+            return reader
+
+    def loaded(self) -> list:
+        return ["+".join(langs) for langs in list(self._readers)]
+
+
+_pool = ReaderPool(OCR_POOL_BUDGET_MB, OCR_READER_ESTIMATE_MB)
+
+
+def get_reader(langs=OCR_DEFAULT_LANGS):
+    return _pool.get(parse_langs(langs))
+
+
+def loaded_readers() -> list:
+    return _pool.loaded()
+
+
+def ocr_request(payload: dict) -> dict:
+    """Send one request to the OCR sidecar and return its decoded reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(OCR_SOCKET_TIMEOUT)
+        sock.connect(OCR_SOCKET)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as reply:
+            line = reply.readline()
+    if not line:
+        raise RuntimeError("OCR sidecar closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise RuntimeError(f"OCR sidecar error: {response['error']}")
+    return response
+
+
+def _read(image_path: str, langs: tuple):
+    """(text, mean confidence) with the reader for `langs`."""
+    results = get_reader(langs).readtext(image_path)
+    if not results:
+        return "", 0.0
+    return " ".join(text for (_, text, _) in results), sum(conf for (_, _, conf) in results) / len(results)
+
+
+def read_image(image_path: str, langs=OCR_DEFAULT_LANGS) -> str:
+    """OCR with the in-process reader pool."""
+    return read_image_detailed(image_path, langs)["text"]
+
+
+def read_image_detailed(image_path: str, langs=OCR_DEFAULT_LANGS) -> dict:
+    """{"text", "langs", "confidence"} for `image_path`."""
+    langs = parse_langs(langs)
+    text, confidence = _read(image_path, langs)
+    return {"text": text, "langs": "+".join(langs), "confidence": confidence}
+
+
+def warm_up():
+    """Make sure OCR is ready: ping the sidecar, or load the reader uploads use by default."""
+    if OCR_SOCKET:
+        ocr_request({"op": "ping"})
+    else:
+        get_reader(langs_for_doc_type("*"))
+
+
+@timed("ocr")
+def extract_text(image_path: str, langs=OCR_DEFAULT_LANGS) -> str:
+    langs = parse_langs(langs)
+    with INFLIGHT_JOBS.labels(job="ocr").track_inprogress():
+        if OCR_SOCKET:
+            payload = {"op": "ocr", "path": os.path.abspath(image_path), "langs": langs}
+            return ocr_request(payload)["text"]
+        return read_image(image_path, langs)
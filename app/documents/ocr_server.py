@@ -0,0 +1,78 @@
+"""
+OCR sidecar: loads the easyocr model once and serves every uvicorn worker on
+the node over a Unix socket, so model memory does not scale with workers.
+
+uvicorn starts workers with spawn rather than fork, so a model loaded in the
+parent would not be shared copy-on-write; one sidecar process is the way to
+hold a single copy. Protocol: one JSON request per line, one JSON reply.
+
+    {"op": "ocr", "path": "/abs/path.jpg", "langs": ["en", "hi"]}  ->  {"text": "..."}
+    {"op": "ping"}                                                 ->  {"ok": true, "readers": [...]}
+
+"langs" may also be "mixed" and defaults to OCR_DEFAULT_LANGS. The reader
+for the default doc_type loads at startup; readers for other language sets
+load on first use in the sidecar's reader pool.
+
+    python -m app.documents.ocr_server --socket /tmp/ocr.sock
+"""
+import argparse
+import json
+import os
+import socketserver
+import threading
+
+from app.common.logger import get_logger
+from app.config.config import OCR_DEFAULT_LANGS
+from app.documents.ocr import get_reader, langs_for_doc_type, loaded_readers, read_image
+
+logger = get_logger(__name__)
+
+# One inference at a time; connections still queue concurrently.
+_ocr_lock = threading.Lock()
+
+
+class OCRRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            if request.get("op") == "ping":
+                response = {"ok": True, "readers": loaded_readers()}
+            elif request.get("op") == "ocr":
+                with _ocr_lock:
+                    response = {"text": read_image(request["path"], request.get("langs") or OCR_DEFAULT_LANGS)}
+            else:
+                response = {"error": f"unknown op: {request.get('op')}"}
+        except Exception as e:
+            logger.exception("OCR sidecar request failed")
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class OCRServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    logger.info("Loading OCR model...")
+    get_reader(langs_for_doc_type("*"))  # what most uploads use; others load on demand
+
+    with OCRServer(socket_path, OCRRequestHandler) as server:
+        os.chmod(socket_path, 0o660)
+        logger.info("OCR sidecar listening on %s", socket_path)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared OCR sidecar")
+    parser.add_argument("--socket", default=os.getenv("OCR_SOCKET", "/tmp/govt-scheme-ocr.sock"))
+    args = parser.parse_args()
+    serve(args.socket)
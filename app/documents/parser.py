@@ -1,4 +1,31 @@
 import re
+from app.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bump whenever parse_12th_marksheet's output can change for the same text;
+# `python -m app.documents.reparse` then brings stored documents and
+# profiles up to date.
+PARSER_VERSION = 1
+
+MARKSHEET_DOC_TYPES = {"12th_marksheet", "marksheet", "12th marksheet"}
+
+
+def is_marksheet(doc_type) -> bool:
+    return str(doc_type or "").lower() in MARKSHEET_DOC_TYPES
+
+
+def profile_fields(parsed: dict) -> dict:
+    """Profile fields a parsed marksheet sets; empty when it yielded no percentage."""
+    if not parsed.get("percentage"):
+        return {}
+    return {
+        "marks_12": parsed.get("percentage"),
+        "board_12": parsed.get("board"),
+        "year_12": parsed.get("year"),
+        "result_12": parsed.get("result"),
+    }
+
 
 def parse_12th_marksheet(text: str):
     """
@@ -61,5 +88,5 @@ def parse_12th_marksheet(text: str):
     elif "THIRD" in t:
         data["division"] = "THIRD"
 
-    print(f"DEBUG - Parsed marksheet data: {data}")
+    logger.debug("Parsed marksheet", extra={"parsed_data": data})
     return data
@@ -0,0 +1,117 @@
+"""
+Text extraction for uploaded PDFs (DigiLocker marksheets, certificates).
+
+Pages with a text layer are read directly. Image-only pages are rendered one
+at a time to a temporary PNG and OCR'd on a small thread pool; at most
+PDF_OCR_CONCURRENCY rendered pages exist at once, so memory stays flat
+however long the file is.
+"""
+import contextvars
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from app.common.logger import get_logger
+from app.common.tracing import span
+from app.config.config import PDF_OCR_CONCURRENCY, PDF_RENDER_SCALE, PDF_MIN_TEXT_CHARS, PDF_MAX_PAGES
+from app.config.config import OCR_DEFAULT_LANGS
+from app.documents.ocr import extract_text
+
+logger = get_logger(__name__)
+
+
+class PDFTooLong(ValueError):
+    pass
+
+
+def _ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _ocr_page(image_path: str, langs):
+    started = time.perf_counter()
+    try:
+        return extract_text(image_path, langs), _ms(started)
+    finally:
+        os.remove(image_path)
+
+
+def extract_pdf_text(path: str, langs=OCR_DEFAULT_LANGS):
+    """
+    Return (text, pages) for the PDF at `path`, where `pages` holds one
+    timing record per page: {"page", "method": "text"|"ocr", "chars", ...}.
+    Image-only pages are OCR'd with `langs`.
+    """
+    # pdfium handles are not thread-safe: all PDF access stays on this thread
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page_count = len(pdf)
+        if page_count > PDF_MAX_PAGES:
+            raise PDFTooLong(f"PDF has {page_count} pages, the limit is {PDF_MAX_PAGES}")
+
+        texts = [""] * page_count
+        pages = [None] * page_count
+
+        def collect(futures):
+            for future in futures:
+                index, render_ms = pending.pop(future)
+                record = {"page": index + 1, "method": "ocr", "render_ms": render_ms}
+                try:
+                    text, record["ocr_ms"] = future.result()
+                except Exception as e:
+                    # One unreadable page should not cost the rest of the document
+                    logger.exception("OCR failed for page %d of %s", index + 1, path)
+                    text, record["error"] = "", str(e)
+                texts[index] = text
+                pages[index] = {**record, "chars": len(text)}
+
+        pending = {}
+        with tempfile.TemporaryDirectory(prefix="pdf-ocr-") as tmp_dir, \
+                ThreadPoolExecutor(max_workers=PDF_OCR_CONCURRENCY) as pool:
+            for index in range(page_count):
+                started = time.perf_counter()
+                page = pdf[index]
+                try:
+                    with span("pdf", "text_layer"):
+                        textpage = page.get_textpage()
+                        text = textpage.get_text_range().strip()
+                        textpage.close()
+                    if len(text) >= PDF_MIN_TEXT_CHARS:
+                        texts[index] = text
+                        pages[index] = {"page": index + 1, "method": "text", "chars": len(text), "ms": _ms(started)}
+                        continue
+
+                    # Image-only page: wait for a free OCR slot before rendering
+                    if len(pending) >= PDF_OCR_CONCURRENCY:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+
+                    started = time.perf_counter()
+                    with span("pdf", "render"):
+                        bitmap = page.render(scale=PDF_RENDER_SCALE)
+                        image = bitmap.to_pil()
+                        image_path = os.path.join(tmp_dir, f"page-{index + 1}.png")
+                        image.save(image_path)
+                        image.close()
+                        bitmap.close()
+                finally:
+                    page.close()
+
+                # Run in a copy of this context so the page's OCR spans land on the request's trace
+                ocr = pool.submit(contextvars.copy_context().run, _ocr_page, image_path, langs)
+                pending[ocr] = (index, _ms(started))
+
+            collect(list(pending))
+    finally:
+        pdf.close()
+
+    ocr_pages = sum(1 for p in pages if p["method"] == "ocr")
+    logger.info(
+        "PDF extracted: %d pages, %d via text layer, %d via OCR",
+        page_count, page_count - ocr_pages, ocr_pages,
+        extra={"pages": pages},
+    )
+    return "\n".join(t for t in texts if t), pages
@@ -0,0 +1,205 @@
+"""
+Re-parse stored marksheet text after `parse_12th_marksheet` changes.
+
+    python -m app.documents.reparse              # start, or resume an interrupted run
+    python -m app.documents.reparse --dry-run    # report what would change, write nothing
+    python -m app.documents.reparse --restart    # ignore the saved checkpoint
+
+Nothing is re-OCR'd: the job reads the `extracted_text` stored with each
+document. Marksheets not yet parsed by the current PARSER_VERSION are
+streamed from documents_col in _id order, each batch is parsed in a process
+pool and written back with bulk_write (document parsed_data + profile
+fields), and the last _id is checkpointed in jobs_col under
+"reparse:v<PARSER_VERSION>" so a rerun picks up after the last full batch.
+
+A profile field is only rewritten while it still holds the value the
+document's previous parse put there. Fields the user edited since, or that a
+newer marksheet set, are left alone and counted as skipped. The write is
+conditional on the values read, so an edit landing between the read and
+the bulk write wins too (counted as profiles_conflicted).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app.common.logger import get_logger
+from app.config.config import REPARSE_BATCH_SIZE, REPARSE_WORKERS
+from app.db.mongo import documents_col, jobs_col, profiles_col
+from app.documents.parser import MARKSHEET_DOC_TYPES, PARSER_VERSION, parse_12th_marksheet, profile_fields
+
+logger = get_logger(__name__)
+
+PROFILE_FIELDS = ("marks_12", "board_12", "year_12", "result_12")
+# Field changes kept verbatim in the report
+MAX_SAMPLES = 20
+# doc_type is free text from the upload form; match it as is_marksheet() does
+MARKSHEET_FILTER = {
+    "$regex": "^(?:%s)$" % "|".join(re.escape(t) for t in sorted(MARKSHEET_DOC_TYPES)),
+    "$options": "i",
+}
+
+
+def _parse_all(texts):
+    return [parse_12th_marksheet(t) for t in texts]
+
+
+async def _parse_batch(pool, texts, workers):
+    """Parse `texts` across the pool in contiguous slices, preserving order."""
+    loop = asyncio.get_running_loop()
+    size = max(1, math.ceil(len(texts) / workers))
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(pool, _parse_all, texts[i:i + size]) for i in range(0, len(texts), size)
+    ))
+    return [parsed for part in parts for parsed in part]
+
+
+def _new_stats(dry_run=False):
+    return {
+        "documents": 0,
+        "documents_changed": 0,
+        # Written profiles as reported by the bulk write; a dry run can only count planned ones
+        "profiles_would_update" if dry_run else "profiles_updated": 0,
+        "fields_changed": {f: 0 for f in PROFILE_FIELDS},
+        "fields_skipped_edited": 0,
+        "profiles_conflicted": 0,
+        "samples": [],
+    }
+
+
+def _diff_batch(batch, parsed, profiles, stats):
+    """Build the bulk writes for one batch and fold its diff into `stats`."""
+    doc_ops, profile_ops = [], []
+    for doc, new in zip(batch, parsed):
+        stats["documents"] += 1
+        old = doc.get("parsed_data") or {}
+        if new != old:
+            stats["documents_changed"] += 1
+        doc_ops.append(UpdateOne(
+            {"_id": doc["_id"]}, {"$set": {"parsed_data": new, "parser_version": PARSER_VERSION}}
+        ))
+
+        profile = profiles.get(doc.get("user_id"))
+        new_fields = profile_fields(new)
+        if profile is None or not new_fields:
+            continue
+        old_fields = profile_fields(old)
+
+        update, expected = {}, {}
+        for field, value in new_fields.items():
+            current = profile.get(field)
+            if current == value:
+                continue
+            if current != old_fields.get(field):
+                stats["fields_skipped_edited"] += 1
+                continue
+            update[field] = value
+            expected[field] = current
+            stats["fields_changed"][field] += 1
+            if len(stats["samples"]) < MAX_SAMPLES:
+                stats["samples"].append({
+                    "user_id": doc.get("user_id"), "field": field, "before": current, "after": value,
+                })
+        if update:
+            # Later marksheets of the same user in this batch compare against it
+            profile.update(update)
+            # Matches nothing if the user edited a field since it was read
+            profile_ops.append(UpdateOne({"user_id": doc["user_id"], **expected}, {"$set": update}))
+    return doc_ops, profile_ops
+
+
+async def reparse(batch_size=REPARSE_BATCH_SIZE, workers=REPARSE_WORKERS, dry_run=False, restart=False) -> dict:
+    workers = workers or os.cpu_count() or 1
+    job_id = f"reparse:v{PARSER_VERSION}"
+    job = None if restart or dry_run else await jobs_col.find_one({"_id": job_id})
+    job = job or {}
+    stats = job.get("stats") or _new_stats(dry_run)
+    last_id = job.get("last_id")
+
+    query = {
+        "doc_type": MARKSHEET_FILTER,
+        "extracted_text": {"$nin": [None, ""]},
+        "parser_version": {"$ne": PARSER_VERSION},
+    }
+    if last_id is not None:
+        query["_id"] = {"$gt": last_id}
+        logger.info("Resuming %s after %s", job_id, last_id)
+    projection = {"user_id": 1, "doc_type": 1, "extracted_text": 1, "parsed_data": 1}
+    cursor = documents_col.find(query, projection).sort("_id", 1).batch_size(batch_size)
+
+    started = time.perf_counter()
+    processed = 0
+
+    async def flush(batch):
+        nonlocal processed
+        parsed = await _parse_batch(pool, [d["extracted_text"] for d in batch], workers)
+        users = list({d.get("user_id") for d in batch})
+        profiles = {
+            p["user_id"]: p
+            async for p in profiles_col.find({"user_id": {"$in": users}}, {"user_id": 1, **{f: 1 for f in PROFILE_FIELDS}})
+        }
+        doc_ops, profile_ops = _diff_batch(batch, parsed, profiles, stats)
+        if dry_run:
+            stats["profiles_would_update"] += len(profile_ops)
+        else:
+            await documents_col.bulk_write(doc_ops, ordered=False)
+            if profile_ops:
+                res = await profiles_col.bulk_write(profile_ops, ordered=True)
+                stats["profiles_updated"] = stats.get("profiles_updated", 0) + res.modified_count
+                stats["profiles_conflicted"] = stats.get("profiles_conflicted", 0) + len(profile_ops) - res.matched_count
+            await jobs_col.update_one(
+                {"_id": job_id},
+                {"$set": {"last_id": batch[-1]["_id"], "stats": stats, "updated_at": datetime.utcnow().isoformat()}},
+                upsert=True,
+            )
+        processed += len(batch)
+        elapsed = time.perf_counter() - started
+        logger.info("Re-parsed %d documents (%.0f docs/s)", processed, processed / elapsed if elapsed else 0.0)
+
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "job": job_id,
+        "dry_run": dry_run,
+        "documents_this_run": processed,
+        "seconds": round(elapsed, 1),
+        "docs_per_sec": round(processed / elapsed, 1) if elapsed else 0.0,
+        **stats,
+    }
+    if not dry_run:
+        await jobs_col.update_one(
+            {"_id": job_id}, {"$set": {"finished_at": datetime.utcnow().isoformat()}}, upsert=True
+        )
+    logger.info("Re-parse finished", extra={"reparse": {k: v for k, v in report.items() if k != "samples"}})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse stored marksheet text into profiles")
+    parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=REPARSE_WORKERS, help="Parser processes (0 = CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without writing anything")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint from an earlier run")
+    args = parser.parse_args()
+    report = asyncio.run(reparse(args.batch_size, args.workers, args.dry_run, args.restart))
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
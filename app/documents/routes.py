@@ -1,15 +1,28 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi.responses import Response
+from bson import ObjectId
+from bson.errors import InvalidId
+import asyncio
 import os
-import uuid
+import tempfile
 
 from app.auth.deps import auth
 from app.db.mongo import documents_col, profiles_col
-from app.documents.ocr import extract_text
-from app.documents.parser import parse_12th_marksheet
+from app.documents.ocr import extract_text, langs_for_doc_type
+from app.documents.pdf import extract_pdf_text, PDFTooLong
+from app.storage.backends import get_storage
+from app.storage.blobs import content_hash, store_blob, release_blob
+from app.documents.parser import PARSER_VERSION, is_marksheet as is_marksheet_type, parse_12th_marksheet, profile_fields
+from app.common.logger import get_logger
+from app.common.tracing import span
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".pdf"}
+# OCR languages of documents stored without an "ocr_langs" field
+OCR_LEGACY_LANGS = "en"
 
 
 @router.post("/api/upload-document")
@@ -24,143 +37,179 @@ async def upload_doc(
     """
 
     user_id = user["user_id"]
-    print(f"\n{'='*80}")
-    print(f"UPLOAD STARTED - User: {user_id}, Doc Type: {doc_type}")
-    print(f"{'='*80}")
+    logger.info("Upload started", extra={"user_id": user_id, "doc_type": doc_type})
 
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail="Only JPG, JPEG, PNG files are allowed for OCR",
+            detail="Only JPG, JPEG, PNG and PDF files are allowed",
+        )
+    data = await file.read()
+    sha = content_hash(data)
+    langs = langs_for_doc_type(doc_type)
+    ocr_langs = "+".join(langs)
+
+    # The same file uploaded before (by anyone) was already read with the
+    # same OCR languages; reuse its text. Documents stored before languages
+    # were recorded were read English-only.
+    with span("mongo"):
+        prior = await documents_col.find_one(
+            {
+                "content_hash": sha,
+                "extracted_text": {"$nin": ["", None]},
+                "ocr_langs": {"$in": [ocr_langs, None]} if ocr_langs == OCR_LEGACY_LANGS else ocr_langs,
+            },
+            {"extracted_text": 1, "pages": 1},
         )
-    user_dir = os.path.join("storage", user_id)
-    os.makedirs(user_dir, exist_ok=True)
-
-    filename = f"{uuid.uuid4()}{ext}"
-    path = os.path.join("storage", user_id, filename)
-
-    with open(path, "wb") as f:
-        f.write(await file.read())
 
-    print(f"File saved to: {path}")
-    try:
-        extracted_text = extract_text(path)
-        print(f"\n{'='*80}")
-        print(f"OCR EXTRACTED TEXT ({len(extracted_text)} chars):")
-        print(f"{'='*80}")
-        print(extracted_text[:500])
-        print(f"{'='*80}\n")
-    except Exception as e:
-        print(f" OCR FAILED: {e}")
-        import traceback
-        traceback.print_exc()
-        extracted_text = ""
+    pages = None
+    if prior:
+        extracted_text, pages = prior["extracted_text"], prior.get("pages")
+        logger.debug("Reusing text extracted from identical upload")
+    else:
+        # OCR reads from local disk whatever the storage backend; it is
+        # CPU-bound, so run it off the event loop
+        with tempfile.TemporaryDirectory(prefix="upload-") as tmp_dir:
+            path = os.path.join(tmp_dir, f"upload{ext}")
+            with open(path, "wb") as f:
+                f.write(data)
+            try:
+                if ext == ".pdf":
+                    extracted_text, pages = await asyncio.to_thread(extract_pdf_text, path, langs)
+                else:
+                    extracted_text = await asyncio.to_thread(extract_text, path, langs)
+                logger.debug("OCR extracted %d chars", len(extracted_text))
+            except PDFTooLong as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                logger.exception("OCR failed for %s", file.filename)
+                extracted_text = ""
+
+    blob = await store_blob(data, ext, file.content_type or "application/octet-stream")
     parsed_data = {}
 
 
            # FIXED: Accept both "marksheet" and "12th_marksheet"
-    is_marksheet = doc_type.lower() in ["12th_marksheet", "marksheet", "12th marksheet"]
-    
-    print(f"DEBUG: doc_type='{doc_type}', is_marksheet={is_marksheet}")
-    
+    is_marksheet = is_marksheet_type(doc_type)
+
     # Parse if it's a 12th marksheet
     if is_marksheet and extracted_text:
         try:
             parsed_data = parse_12th_marksheet(extracted_text)
-            print(f"\n{'='*80}")
-            print(f"PARSED MARKSHEET DATA:")
-            print(f"{'='*80}")
-            print(f"Board: {parsed_data.get('board')}")
-            print(f"Year: {parsed_data.get('year')}")
-            print(f"Percentage: {parsed_data.get('percentage')}")
-            print(f"Result: {parsed_data.get('result')}")
-            print(f"Full parsed data: {parsed_data}")
-            print(f"{'='*80}\n")
         except Exception as e:
-            print(f"❌ PARSING FAILED: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Marksheet parsing failed")
             parsed_data = {}
     else:
-        print(f"⚠️ Skipping parsing: is_marksheet={is_marksheet}, has_text={bool(extracted_text)}")
-    
+        logger.debug("Skipping parsing: is_marksheet=%s, has_text=%s", is_marksheet, bool(extracted_text))
+
     # Store document in documents collection
     doc = {
         "user_id": user_id,
         "doc_type": doc_type,
-        "filename": filename,
-        "path": path,
+        "filename": file.filename,
+        "content_hash": blob["content_hash"],
+        "storage_key": blob["key"],
+        "thumbnail_key": blob["thumbnail_key"],
+        "size": blob["size"],
         "extracted_text": extracted_text,
         "parsed_data": parsed_data,
+        "parser_version": PARSER_VERSION,
+        "ocr_langs": ocr_langs,
     }
+    if pages is not None:
+        doc["pages"] = pages
 
-    res = await documents_col.insert_one(doc)
-    doc_id = str(res.inserted_id)
+    with span("mongo"):
+        res = await documents_col.insert_one(doc)
+        doc_id = str(res.inserted_id)
 
-    print(f" Document saved to MongoDB with ID: {doc_id}")
-
-    # Add document reference to profile
-    await profiles_col.update_one(
-        {"user_id": user_id},
-        {
-            "$push": {
-                "documents": {
-                    "doc_id": doc_id,
-                    "doc_type": doc_type,
-                }
-            }
-        },
-        upsert=True,
-    )
-    print(f"✅ Document reference added to profile")
-
-    # Update profile with parsed marksheet data
-    if is_marksheet and parsed_data.get("percentage"):
-        print(f"\n{'='*80}")
-        print(f"UPDATING PROFILE WITH MARKSHEET DATA")
-        print(f"{'='*80}")
-        
-        update_result = await profiles_col.update_one(
+        # Add document reference to profile
+        await profiles_col.update_one(
             {"user_id": user_id},
             {
-                "$set": {
-                    "marks_12": parsed_data.get("percentage"),
-                    "board_12": parsed_data.get("board"),
-                    "year_12": parsed_data.get("year"),
-                    "result_12": parsed_data.get("result"),
+                "$push": {
+                    "documents": {
+                        "doc_id": doc_id,
+                        "doc_type": doc_type,
+                    }
                 }
             },
             upsert=True,
         )
-        
-        print(f"✅ Profile updated - Matched: {update_result.matched_count}, Modified: {update_result.modified_count}")
-        
-        # Verify the update
-        updated_profile = await profiles_col.find_one({"user_id": user_id})
-        print(f"\n{'='*80}")
-        print(f"VERIFIED PROFILE DATA IN MONGODB:")
-        print(f"{'='*80}")
-        if updated_profile:
-            print(f"Name: {updated_profile.get('name')}")
-            print(f"State: {updated_profile.get('state')}")
-            print(f"Board 12: {updated_profile.get('board_12')}")
-            print(f"Marks 12: {updated_profile.get('marks_12')}")
-            print(f"Year 12: {updated_profile.get('year_12')}")
-            print(f"Result 12: {updated_profile.get('result_12')}")
-        else:
-            print(" PROFILE NOT FOUND IN MONGODB!")
-        print(f"{'='*80}\n")
-    else:
-        print(f" Not updating profile: is_marksheet={is_marksheet}, has_percentage={bool(parsed_data.get('percentage'))}")
-    
-    print(f"\n{'='*80}")
-    print(f"UPLOAD COMPLETE")
-    print(f"{'='*80}\n")
+
+        # Update profile with parsed marksheet data
+        if is_marksheet and parsed_data.get("percentage"):
+            await profiles_col.update_one(
+                {"user_id": user_id},
+                {"$set": profile_fields(parsed_data)},
+                upsert=True,
+            )
+            # Imported here so langchain stays off the startup path
+            from app.components.prefetch import schedule_prefetch
+            await schedule_prefetch(user_id, await profiles_col.find_one({"user_id": user_id}))
+
+    logger.info(
+        "Upload complete",
+        extra={
+            "doc_id": doc_id,
+            "ocr_chars": len(extracted_text),
+            "deduplicated": blob["deduplicated"],
+            "profile_updated": bool(is_marksheet and parsed_data.get("percentage")),
+        },
+    )
 
     return {
         "ok": True,
         "doc_id": doc_id,
         "parsed_data": parsed_data,
         "extracted_preview": extracted_text[:300],
+        "thumbnail_url": f"/api/documents/{doc_id}/thumbnail" if blob["thumbnail_key"] else None,
     }
+
+
+async def _find_user_document(doc_id: str, user_id: str, projection: dict):
+    try:
+        oid = ObjectId(doc_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=404, detail="Document not found")
+    with span("mongo"):
+        doc = await documents_col.find_one({"_id": oid, "user_id": user_id}, projection)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return doc
+
+
+@router.get("/api/documents/{doc_id}/thumbnail")
+async def document_thumbnail(doc_id: str, user=Depends(auth)):
+    doc = await _find_user_document(doc_id, user["user_id"], {"thumbnail_key": 1})
+    if not doc.get("thumbnail_key"):
+        raise HTTPException(status_code=404, detail="No thumbnail for this document")
+
+    with span("storage", "get"):
+        content = await asyncio.to_thread(get_storage().get, doc["thumbnail_key"])
+    # Keys are content hashes, so a thumbnail never changes
+    return Response(content, media_type="image/jpeg", headers={"Cache-Control": "private, max-age=86400"})
+
+
+@router.delete("/api/documents/{doc_id}")
+async def delete_document(doc_id: str, user=Depends(auth)):
+    """Delete a document, unlink it from the profile and drop its blob reference."""
+    user_id = user["user_id"]
+    doc = await _find_user_document(doc_id, user_id, {"content_hash": 1, "path": 1})
+
+    with span("mongo"):
+        await documents_col.delete_one({"_id": doc["_id"], "user_id": user_id})
+        await profiles_col.update_one({"user_id": user_id}, {"$pull": {"documents": {"doc_id": doc_id}}})
+
+    if doc.get("content_hash"):
+        await release_blob(doc["content_hash"])
+    elif doc.get("path"):
+        # Uploads from before content-addressed storage own their file outright
+        try:
+            os.remove(doc["path"])
+        except FileNotFoundError:
+            pass
+
+    logger.info("Document deleted", extra={"doc_id": doc_id, "user_id": user_id})
+    return {"ok": True}
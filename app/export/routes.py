@@ -0,0 +1,130 @@
+"""
+Streaming export of everything stored for a user, as NDJSON.
+
+Records are read from Mongo cursors in batches and written out as they
+arrive, so memory stays flat however long the history is. Conversation
+messages are paged with $slice rather than loading the chat document whole.
+Every line is one JSON object with a "type":
+
+    export, profile, conversation, message, ask, document
+"""
+import json
+import time
+import zlib
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.auth.deps import auth
+from app.common.logger import get_logger
+from app.config.config import EXPORT_BATCH_SIZE
+from app.db.mongo import chats_col, documents_col, profiles_col
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+EXPORT_VERSION = 1
+# Flush to the client once this much output is buffered
+_FLUSH_BYTES = 64 * 1024
+
+# Storage internals that mean nothing outside this deployment
+_DOCUMENT_FIELDS_HIDDEN = {"path": 0, "storage_key": 0, "thumbnail_key": 0}
+
+
+def _line(record: dict) -> bytes:
+    return (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode()
+
+
+async def _conversation_messages(chat_id: ObjectId):
+    skip = 0
+    while True:
+        chat = await chats_col.find_one({"_id": chat_id}, {"messages": {"$slice": [skip, EXPORT_BATCH_SIZE]}})
+        messages = (chat or {}).get("messages") or []
+        for index, message in enumerate(messages, start=skip):
+            yield index, message
+        if len(messages) < EXPORT_BATCH_SIZE:
+            return
+        skip += EXPORT_BATCH_SIZE
+
+
+async def export_records(user_id: str):
+    """Yield every export record for `user_id`, in a stable order."""
+    yield {
+        "type": "export",
+        "version": EXPORT_VERSION,
+        "user_id": user_id,
+        "exported_at": datetime.utcnow().isoformat(),
+    }
+
+    profile = await profiles_col.find_one({"user_id": user_id}, {"_id": 0})
+    if profile:
+        yield {"type": "profile", **profile}
+
+    chats = chats_col.find({"user_id": user_id}, {"messages": 0}).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    async for chat in chats:
+        chat_id = chat.pop("_id")
+        if "question" in chat:
+            # /api/ask history: one document per question
+            yield {"type": "ask", "id": str(chat_id), **chat}
+            continue
+
+        yield {"type": "conversation", "id": str(chat_id), **chat}
+        async for index, message in _conversation_messages(chat_id):
+            yield {"type": "message", "conversation_id": str(chat_id), "index": index, **message}
+
+    documents = documents_col.find({"user_id": user_id}, _DOCUMENT_FIELDS_HIDDEN)
+    async for doc in documents.sort("_id", 1).batch_size(EXPORT_BATCH_SIZE):
+        yield {"type": "document", "id": str(doc.pop("_id")), **doc}
+
+
+async def _stream(user_id: str, compress: bool):
+    started = time.perf_counter()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip framing
+    buffer = bytearray()
+    counts = {}
+    sent = 0
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    async for record in export_records(user_id):
+        counts[record["type"]] = counts.get(record["type"], 0) + 1
+        buffer += _line(record)
+        if len(buffer) >= _FLUSH_BYTES:
+            out = emit(bytes(buffer))
+            buffer.clear()
+            if out:
+                sent += len(out)
+                yield out
+
+    out = emit(bytes(buffer))
+    if compressor:
+        out += compressor.flush()
+    sent += len(out)
+    yield out
+
+    logger.info(
+        "Export finished",
+        extra={
+            "user_id": user_id,
+            "records": counts,
+            "bytes": sent,
+            "gzip": compress,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    )
+
+
+@router.get("/api/export")
+async def export_user_data(gzip: bool = False, user=Depends(auth)):
+    """Download the caller's profile, chats and documents as NDJSON (optionally gzipped)."""
+    user_id = user["user_id"]
+    filename = f"export-{user_id}.ndjson" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _stream(user_id, gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
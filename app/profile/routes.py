@@ -18,4 +18,9 @@ async def save_basic(data: BasicProfile, user=Depends(auth)):
         {"$set": data.dict()},
         upsert=True
     )
+    # The first question will be scoped to this profile; start retrieving now.
+    # Imported here so langchain stays off the startup path
+    from app.components.prefetch import schedule_prefetch
+    profile = await profiles_col.find_one({"user_id": user["user_id"]})
+    await schedule_prefetch(user["user_id"], profile)
     return {"ok": True}
@@ -3,10 +3,15 @@ from app.db.mongo import profiles_col, chats_col, users_col, documents_col, db
 from typing import Optional
 import bcrypt
 from datetime import datetime
+from app.common.logger import get_logger
+from app.common.tracing import timed
+
+logger = get_logger(__name__)
 
 
 # ==================== CONVERSATIONS ====================
 
+@timed("mongo")
 async def list_conversations(user_id: str):
     """List all conversations for a user"""
     conversations = await chats_col.find(
@@ -23,6 +28,7 @@ async def list_conversations(user_id: str):
     ]
 
 
+@timed("mongo")
 async def create_conversation(user_id: str, title="New Chat"):
     """Create a new conversation"""
     conversation = {
@@ -35,6 +41,7 @@ async def create_conversation(user_id: str, title="New Chat"):
     return str(result.inserted_id)
 
 
+@timed("mongo")
 async def get_conversation(conversation_id: str):
     """Get a single conversation by ID"""
     from bson import ObjectId
@@ -51,6 +58,7 @@ async def get_conversation(conversation_id: str):
     return None
 
 
+@timed("mongo")
 async def get_messages(conversation_id: str):
     """Get all messages in a conversation"""
     from bson import ObjectId
@@ -73,6 +81,7 @@ async def get_messages(conversation_id: str):
     return []
 
 
+@timed("mongo")
 async def add_message(conversation_id: str, role: str, content: str, sources=None):
     """Add a message to a conversation"""
     from bson import ObjectId
@@ -90,9 +99,43 @@ async def add_message(conversation_id: str, role: str, content: str, sources=Non
             {"$push": {"messages": message}}
         )
     except Exception as e:
-        print(f"Error adding message: {e}")
+        logger.error("Error adding message: %s", e)
+
+
+@timed("mongo")
+async def record_turn(conversation_id: str, messages: list, title: Optional[str] = None):
+    """
+    Append a whole chat turn (user + assistant messages) to a conversation,
+    optionally setting its title, in a single atomic update.
+    """
+    from bson import ObjectId
+
+    now = datetime.utcnow().isoformat()
+    update = {
+        "$push": {
+            "messages": {
+                "$each": [
+                    {
+                        "role": msg["role"],
+                        "content": msg["content"],
+                        "sources": msg.get("sources") or [],
+                        "created_at": now,
+                    }
+                    for msg in messages
+                ]
+            }
+        }
+    }
+    if title:
+        update["$set"] = {"title": title}
+
+    try:
+        await chats_col.update_one({"_id": ObjectId(conversation_id)}, update)
+    except Exception as e:
+        logger.error("Error recording turn: %s", e)
 
 
+@timed("mongo")
 async def rename_conversation(conversation_id: str, title: str):
     """Rename a conversation"""
     from bson import ObjectId
@@ -103,9 +146,10 @@ async def rename_conversation(conversation_id: str, title: str):
             {"$set": {"title": title}}
         )
     except Exception as e:
-        print(f"Error renaming conversation: {e}")
+        logger.error("Error renaming conversation: %s", e)
 
 
+@timed("mongo")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation"""
     from bson import ObjectId
@@ -113,11 +157,12 @@ async def delete_conversation(conversation_id: str):
     try:
         await chats_col.delete_one({"_id": ObjectId(conversation_id)})
     except Exception as e:
-        print(f"Error deleting conversation: {e}")
+        logger.error("Error deleting conversation: %s", e)
 
 
 # ==================== USERS ====================
 
+@timed("mongo")
 async def create_user(user_id: str, email: str, password_hash: str):
     """Create a new user"""
     try:
@@ -130,10 +175,11 @@ async def create_user(user_id: str, email: str, password_hash: str):
         await users_col.insert_one(user)
         return user_id
     except Exception as e:
-        print(f"Error creating user: {e}")
+        logger.error("Error creating user: %s", e)
         return None
 
 
+@timed("mongo")
 async def get_user_by_email(email: str):
     """Get user by email"""
     user = await users_col.find_one({"email": email})
@@ -146,6 +192,7 @@ async def get_user_by_email(email: str):
     return None
 
 
+@timed("mongo")
 async def get_user_by_id(user_id: str):
     """Get user by ID"""
     user = await users_col.find_one({"user_id": user_id})
@@ -159,6 +206,7 @@ async def get_user_by_id(user_id: str):
 
 # ==================== PROFILES ====================
 
+@timed("mongo")
 async def get_profile(user_id: str):
     """
     Get user profile from MongoDB profiles collection.
@@ -170,6 +218,7 @@ async def get_profile(user_id: str):
     return profile
 
 
+@timed("mongo")
 async def save_profile(user_id: str, name: str, dob: str, state: str, income: float, category: str):
     """Save or update user profile in MongoDB"""
     await profiles_col.update_one(
@@ -190,6 +239,7 @@ async def save_profile(user_id: str, name: str, dob: str, state: str, income: fl
 
 # ==================== DOCUMENTS ====================
 
+@timed("mongo")
 async def save_document(doc_id: str, user_id: str, doc_type: str, file_path: str, extracted_text: str):
     """Save document to MongoDB"""
     doc = {
@@ -203,6 +253,7 @@ async def save_document(doc_id: str, user_id: str, doc_type: str, file_path: str
     await documents_col.insert_one(doc)
 
 
+@timed("mongo")
 async def get_user_documents(user_id: str):
     """Get all documents for a user"""
     docs = await documents_col.find({"user_id": user_id}).to_list(length=None)
@@ -216,6 +267,7 @@ async def get_user_documents(user_id: str):
     ]
 
 
+@timed("mongo")
 async def get_document_text(user_id: str):
     """Get all extracted text from user documents"""
     docs = await documents_col.find({"user_id": user_id}).to_list(length=None)
@@ -0,0 +1,57 @@
+"""
+Production entry point: start the shared OCR sidecar, then uvicorn workers
+that delegate OCR to it over OCR_SOCKET.
+
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import uvicorn
+
+
+def wait_for_socket(path: str, proc: subprocess.Popen, timeout: float):
+    from app.documents.ocr import ocr_request
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"OCR sidecar exited with code {proc.returncode}")
+        if os.path.exists(path):
+            try:
+                ocr_request({"op": "ping"})
+                return
+            except OSError:
+                pass
+        time.sleep(0.5)
+    raise SystemExit(f"OCR sidecar did not come up within {timeout:.0f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--ocr-socket", default=os.getenv("OCR_SOCKET", "/tmp/govt-scheme-ocr.sock"))
+    parser.add_argument("--ocr-startup-timeout", type=float, default=180)
+    args = parser.parse_args()
+
+    # Workers and the readiness check below read OCR_SOCKET from the environment
+    os.environ["OCR_SOCKET"] = args.ocr_socket
+
+    sidecar = subprocess.Popen(
+        [sys.executable, "-m", "app.documents.ocr_server", "--socket", args.ocr_socket]
+    )
+    try:
+        wait_for_socket(args.ocr_socket, sidecar, args.ocr_startup_timeout)
+        uvicorn.run("app.application:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        sidecar.terminate()
+        sidecar.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Object storage for uploaded documents and their thumbnails.
+
+Backends are synchronous (local file I/O, boto3); call them from a thread
+(asyncio.to_thread) on the request path. Select one with STORAGE_BACKEND:
+
+    local  files under STORAGE_LOCAL_ROOT
+    s3     S3_BUCKET on AWS, or any S3-compatible server via S3_ENDPOINT_URL
+           (MinIO, moto_server, localstack) for local testing
+"""
+import os
+from functools import lru_cache
+from typing import Iterator, Tuple
+
+from app.common.logger import get_logger
+from app.config.config import STORAGE_BACKEND, STORAGE_LOCAL_ROOT, S3_BUCKET, S3_ENDPOINT_URL, S3_PREFIX
+
+logger = get_logger(__name__)
+
+
+class Storage:
+    """Flat key -> bytes store. Keys use "/" separators."""
+
+    def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> Iterator[Tuple[str, float]]:
+        """Yield (key, last-modified epoch seconds) for every key under `prefix`."""
+        raise NotImplementedError
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Key escapes storage root: {key}")
+        return path
+
+    def put(self, key, data, content_type="application/octet-stream"):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key):
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def list(self, prefix=""):
+        base = self._path(prefix) if prefix else self.root
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, "/"), mtime
+
+
+class S3Storage(Storage):
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None):
+        from app.components.aws_clients import get_client
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = get_client("s3", endpoint_url=endpoint_url)
+
+    def put(self, key, data, content_type="application/octet-stream"):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data, ContentType=content_type)
+
+    def get(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def list(self, prefix=""):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix):], obj["LastModified"].timestamp()
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> Storage:
+    if STORAGE_BACKEND == "s3":
+        if not S3_BUCKET:
+            raise ValueError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        logger.info("Using S3 storage: bucket=%s endpoint=%s", S3_BUCKET, S3_ENDPOINT_URL or "aws")
+        return S3Storage(S3_BUCKET, prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL)
+    logger.info("Using local storage at %s", STORAGE_LOCAL_ROOT)
+    return LocalStorage(STORAGE_LOCAL_ROOT)
@@ -0,0 +1,281 @@
+"""
+Content-addressed, reference-counted document blobs.
+
+Each distinct upload is stored once under blobs/<sha[:2]>/<sha>, with a
+record in the `blobs` collection:
+
+    {_id: sha256, key, thumbnail_key, size, content_type, refcount, created_at, updated_at}
+
+Documents reference a blob by `content_hash`. Releasing a document only
+decrements the refcount; objects are removed by `collect_garbage`, which also
+repairs refcounts from documents_col and sweeps stored objects that no record
+points to. Anything touched within STORAGE_GC_GRACE seconds is left alone so
+the GC never races an upload in progress.
+
+The GC runs in one process per node (see gc_loop), or on its own:
+
+    python -m app.storage.blobs
+    python -m app.storage.blobs --dry-run    # report what would be removed
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+
+from app.common.logger import get_logger
+from app.common.tracing import span
+from app.components.singleflight import FileLockStore
+from app.config.config import STORAGE_GC_GRACE, STORAGE_GC_INTERVAL, STORAGE_GC_LOCK_DIR, THUMBNAIL_SIZE
+from app.db.mongo import blobs_col, documents_col, users_col
+from app.storage.backends import get_storage
+
+logger = get_logger(__name__)
+
+BLOB_PREFIX = "blobs/"
+THUMB_PREFIX = "thumbs/"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_thumbnail(data: bytes, ext: str, size: int = THUMBNAIL_SIZE):
+    """JPEG preview of an image, or of the first page of a PDF; None if it can't be rendered."""
+    from PIL import Image
+
+    try:
+        if ext == ".pdf":
+            import pypdfium2 as pdfium
+
+            pdf = pdfium.PdfDocument(data)
+            try:
+                page = pdf[0]
+                scale = size / max(page.get_size())
+                image = page.render(scale=max(scale, 0.1)).to_pil()
+                page.close()
+            finally:
+                pdf.close()
+        else:
+            image = Image.open(io.BytesIO(data))
+
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=80, optimize=True)
+        return out.getvalue()
+    except Exception:
+        logger.exception("Thumbnail generation failed")
+        return None
+
+
+def _write_objects(key: str, thumbnail_key: str, data: bytes, ext: str, content_type: str):
+    storage = get_storage()
+    storage.put(key, data, content_type)
+    thumbnail = make_thumbnail(data, ext)
+    if thumbnail is not None:
+        storage.put(thumbnail_key, thumbnail, "image/jpeg")
+        return True
+    return False
+
+
+async def store_blob(data: bytes, ext: str, content_type: str) -> dict:
+    """
+    Store `data` once and take a reference to it. Returns the blob record
+    fields documents need: content_hash, key, thumbnail_key, size, deduplicated.
+    """
+    sha = content_hash(data)
+    # No extension in the key: the same bytes uploaded as .jpg and .jpeg are one blob
+    key = f"{BLOB_PREFIX}{sha[:2]}/{sha}"
+    thumbnail_key = f"{THUMB_PREFIX}{sha[:2]}/{sha}.jpg"
+    now = time.time()
+
+    with span("mongo"):
+        res = await blobs_col.update_one(
+            {"_id": sha},
+            {
+                "$inc": {"refcount": 1},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {
+                    "key": key, "size": len(data), "content_type": content_type, "created_at": now,
+                },
+            },
+            upsert=True,
+        )
+    deduplicated = res.upserted_id is None
+
+    storage = get_storage()
+    with span("storage", "put"):
+        # A record without its object (e.g. a GC that raced this upload) is
+        # repaired here, so check rather than trust `deduplicated`.
+        if not deduplicated or not await asyncio.to_thread(storage.exists, key):
+            has_thumbnail = await asyncio.to_thread(_write_objects, key, thumbnail_key, data, ext, content_type)
+            with span("mongo"):
+                await blobs_col.update_one(
+                    {"_id": sha}, {"$set": {"thumbnail_key": thumbnail_key if has_thumbnail else None}}
+                )
+        else:
+            blob = await blobs_col.find_one({"_id": sha}, {"thumbnail_key": 1})
+            has_thumbnail = bool(blob and blob.get("thumbnail_key"))
+
+    return {
+        "content_hash": sha,
+        "key": key,
+        "thumbnail_key": thumbnail_key if has_thumbnail else None,
+        "size": len(data),
+        "deduplicated": deduplicated,
+    }
+
+
+async def release_blob(sha: str):
+    """Drop one reference; the object itself is removed later by the GC."""
+    with span("mongo"):
+        await blobs_col.update_one({"_id": sha}, {"$inc": {"refcount": -1}, "$set": {"updated_at": time.time()}})
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def collect_garbage(grace: float = STORAGE_GC_GRACE, dry_run: bool = False) -> dict:
+    """
+    Reconcile documents_col, the blobs collection and the object store:
+
+    1. documents whose owner no longer exists are deleted, with the files of
+       legacy (pre content-addressed) ones;
+    2. each settled blob's refcount is reset to the number of documents
+       referencing it;
+    3. blobs left with no references have their objects and record removed;
+    4. stored objects that no blob record points to are deleted.
+
+    With `dry_run` nothing is changed; the counts are what would be.
+    """
+    storage = get_storage()
+    cutoff = time.time() - grace
+    stats = {
+        "dry_run": dry_run, "orphan_documents": 0, "legacy_files_deleted": 0,
+        "refcounts_fixed": 0, "blobs_deleted": 0, "objects_deleted": 0,
+    }
+
+    # Documents without an owner id are left alone: they can't be matched
+    # to a deleted user, and {"$in": [None]} would also match a missing field
+    owners = {
+        doc["user_id"] async for doc in documents_col.find({"user_id": {"$nin": ["", None]}}, {"user_id": 1})
+    }
+    existing = {u["user_id"] async for u in users_col.find({"user_id": {"$in": list(owners)}}, {"user_id": 1})}
+    orphaned = sorted(owners - existing)
+    if orphaned:
+        docs = [
+            doc async for doc in documents_col.find(
+                {"user_id": {"$in": orphaned}}, {"user_id": 1, "content_hash": 1, "path": 1}
+            )
+        ]
+        ids = [doc["_id"] for doc in docs]
+        logger.info(
+            "Deleting documents of deleted users",
+            extra={"user_ids": orphaned, "doc_ids": [str(i) for i in ids], "dry_run": dry_run},
+        )
+        if dry_run:
+            stats["orphan_documents"] = len(ids)
+        elif ids:
+            res = await documents_col.delete_many({"_id": {"$in": ids}, "user_id": {"$in": orphaned}})
+            stats["orphan_documents"] = res.deleted_count
+        for doc in docs:
+            # Uploads from before content-addressed storage own their file outright
+            if doc.get("path") and not doc.get("content_hash"):
+                if not dry_run:
+                    await asyncio.to_thread(_remove_file, doc["path"])
+                stats["legacy_files_deleted"] += 1
+    orphaned = set(orphaned)
+
+    references = {}
+    async for doc in documents_col.find({"content_hash": {"$exists": True}}, {"content_hash": 1, "user_id": 1}):
+        if doc.get("user_id") in orphaned:
+            continue  # only still there on a dry run
+        references[doc["content_hash"]] = references.get(doc["content_hash"], 0) + 1
+
+    live_keys = set()
+    async for blob in blobs_col.find({}):
+        sha = blob["_id"]
+        if blob.get("updated_at", 0) >= cutoff:
+            live_keys.update(k for k in (blob.get("key"), blob.get("thumbnail_key")) if k)
+            continue
+
+        count = references.get(sha, 0)
+        if count > 0:
+            live_keys.update(k for k in (blob.get("key"), blob.get("thumbnail_key")) if k)
+            if blob.get("refcount") != count:
+                if not dry_run:
+                    await blobs_col.update_one(
+                        {"_id": sha, "updated_at": blob.get("updated_at")}, {"$set": {"refcount": count}}
+                    )
+                stats["refcounts_fixed"] += 1
+            continue
+
+        if dry_run:
+            stats["blobs_deleted"] += 1
+            continue
+        # Claim the record first; an upload that took a reference meanwhile
+        # bumped updated_at and the delete matches nothing.
+        res = await blobs_col.delete_one({"_id": sha, "updated_at": blob.get("updated_at")})
+        if res.deleted_count:
+            for key in (blob.get("key"), blob.get("thumbnail_key")):
+                if key:
+                    await asyncio.to_thread(storage.delete, key)
+            stats["blobs_deleted"] += 1
+
+    for prefix in (BLOB_PREFIX, THUMB_PREFIX):
+        listed = await asyncio.to_thread(lambda p=prefix: list(storage.list(p)))
+        for key, modified in listed:
+            if key in live_keys or modified >= cutoff:
+                continue
+            sha = key.rsplit("/", 1)[-1].split(".", 1)[0]
+            if await blobs_col.find_one({"_id": sha}, {"_id": 1}):
+                continue
+            if not dry_run:
+                await asyncio.to_thread(storage.delete, key)
+            stats["objects_deleted"] += 1
+
+    logger.info("Storage GC finished", extra={"gc": stats})
+    return stats
+
+
+async def gc_loop(interval: float = STORAGE_GC_INTERVAL):
+    """
+    Run `collect_garbage` every `interval` seconds until cancelled, in one
+    uvicorn worker per node: the worker that takes the GC flock keeps it for
+    its lifetime, the others keep retrying in case it goes away.
+    """
+    locks = FileLockStore(STORAGE_GC_LOCK_DIR)
+    fd = None
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if fd is None:
+                fd = locks.try_lock("storage-gc")
+                if fd is None:
+                    continue
+                logger.info("This worker runs the storage GC")
+            try:
+                await collect_garbage()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Storage GC failed")
+    finally:
+        if fd is not None:
+            locks.unlock(fd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile documents, blob records and stored objects.")
+    parser.add_argument("--grace", type=float, default=STORAGE_GC_GRACE,
+                        help="Leave anything touched within this many seconds alone")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without removing it")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(collect_garbage(args.grace, args.dry_run)), indent=2))
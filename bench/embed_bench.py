@@ -0,0 +1,126 @@
+"""
+Embedding throughput benchmark: local sentence-transformers vs Bedrock Titan.
+
+Embeds the chunked data/pdfs corpus (or its first --limit chunks) with each
+backend in batches and reports model load time, texts/sec, per-batch
+p50/p95 latency, vector dimension and peak RSS. Results are written as JSON
+next to the ingestion benchmark's.
+
+    python -m bench.embed_bench                          # local vs bedrock
+    python -m bench.embed_bench --backend local --threads 1 --threads 4
+    LOCAL_EMBEDDING_RUNTIME=torch python -m bench.embed_bench --backend local
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from bench.ingest_bench import RESULTS_DIR, git_revision, peak_rss_mb
+from bench.loadtest import percentile
+
+
+def load_texts(data_path, limit):
+    from app.components.pdf_loader import load_pdf_files, create_text_chunks
+
+    chunks = create_text_chunks(load_pdf_files(data_path))
+    texts = [c.page_content for c in chunks]
+    if not texts:
+        raise SystemExit(f"No chunks produced from {data_path}")
+    return texts[:limit] if limit else texts
+
+
+def _build_model(backend, threads):
+    from app.components.embeddings import get_embedding_model
+
+    if backend == "local":
+        # Bypass the per-process cache so each --threads value gets its own model
+        from app.components.local_embeddings import LocalEmbeddings
+        return LocalEmbeddings(threads=threads)
+    # Uncached: the benchmark measures the model, not the shared cache
+    return get_embedding_model(backend, cached=False)
+
+
+def run_backend(backend, texts, batch_size, threads=0):
+    started = time.perf_counter()
+    model = _build_model(backend, threads)
+    load_seconds = time.perf_counter() - started
+
+    # One untimed call so lazy session setup is not counted as throughput
+    model.embed_query("warm up")
+
+    batch_latencies = []
+    dimension = 0
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        batch_started = time.perf_counter()
+        vectors = model.embed_documents(texts[start:start + batch_size])
+        batch_latencies.append((time.perf_counter() - batch_started) * 1000)
+        dimension = len(vectors[0]) if vectors else dimension
+    seconds = time.perf_counter() - started
+
+    return {
+        "backend": backend,
+        "threads": threads or None,
+        "texts": len(texts),
+        "batch_size": batch_size,
+        "load_seconds": round(load_seconds, 2),
+        "seconds": round(seconds, 3),
+        "texts_per_sec": round(len(texts) / seconds, 1) if seconds else None,
+        "batch_p50_ms": round(percentile(batch_latencies, 50), 1),
+        "batch_p95_ms": round(percentile(batch_latencies, 95), 1),
+        "dimension": dimension,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_runs(runs):
+    print(f"\n{'backend':<10}{'threads':>8}{'texts':>8}{'load s':>9}{'texts/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'dim':>7}")
+    for r in runs:
+        print(
+            f"{r['backend']:<10}{r['threads'] or '-':>8}{r['texts']:>8}{r['load_seconds']:>9}"
+            f"{r['texts_per_sec']:>10}{r['batch_p50_ms']:>10}{r['batch_p95_ms']:>10}{r['dimension']:>7}"
+        )
+
+
+def main():
+    from app.config.config import DATA_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-path", default=DATA_PATH)
+    parser.add_argument("--backend", action="append", choices=["local", "bedrock", "fake"],
+                        help="Backend to measure (repeatable, default: local and bedrock)")
+    parser.add_argument("--threads", type=int, action="append",
+                        help="Thread count for the local backend (repeatable, default: runtime default)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--limit", type=int, help="Embed only the first N chunks")
+    parser.add_argument("--output", help="Results file (default: bench/results/embed_<timestamp>.json)")
+    args = parser.parse_args()
+
+    texts = load_texts(args.data_path, args.limit)
+
+    runs = []
+    for backend in args.backend or ["local", "bedrock"]:
+        for threads in (args.threads or [0]) if backend == "local" else [0]:
+            try:
+                runs.append(run_backend(backend, texts, args.batch_size, threads))
+            except Exception as e:
+                print(f"{backend}: skipped ({e})")
+    print_runs(runs)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"embed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "benchmark": "embed",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "runs": runs,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
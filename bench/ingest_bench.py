@@ -0,0 +1,201 @@
+"""
+Ingestion pipeline benchmark: load -> chunk -> dedup -> embed -> index.
+
+Runs the same components as process_and_store_pdfs over data/pdfs (or a
+synthetic corpus scaled N times) with a local deterministic embedder, and
+reports per-stage throughput, peak RSS and index size. Results are written as
+JSON so runs can be compared over time.
+
+    python -m bench.ingest_bench
+    python -m bench.ingest_bench --scale 10 --scale 100
+    python -m bench.ingest_bench --embedder configured   # use get_embedding_model()
+    python -m bench.ingest_bench --embedder local        # quantized sentence-transformers
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def peak_rss_mb() -> float:
+    """High-water resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def _shuffle_lines(text: str, rng: random.Random) -> str:
+    lines = []
+    for line in text.split("\n"):
+        words = line.split(" ")
+        rng.shuffle(words)
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def scale_documents(documents, factor: int):
+    """
+    Synthetic corpus: `factor` copies of every page. Copies after the first
+    have their words shuffled within each line, so they keep the page's size
+    and layout but are not near-duplicates of the original.
+    """
+    from langchain_core.documents import Document
+
+    if factor <= 1:
+        return documents
+    scaled = list(documents)
+    for copy_index in range(1, factor):
+        rng = random.Random(copy_index)
+        for doc in documents:
+            scaled.append(Document(
+                page_content=_shuffle_lines(doc.page_content, rng),
+                metadata={**doc.metadata, "synthetic_copy": copy_index},
+            ))
+    return scaled
+
+
+class Stage:
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.result = {}
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        return False
+
+    def record(self, items, **extra):
+        self.result = {
+            "seconds": round(self.seconds, 3),
+            "items": items,
+            f"{self.unit}_per_sec": round(items / self.seconds, 1) if self.seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+            **extra,
+        }
+        return self.result
+
+
+def run_benchmark(data_path, scale, embedder, batch_size, dedup=True):
+    from langchain_community.vectorstores import FAISS
+
+    from app.components.pdf_loader import load_pdf_files, create_text_chunks
+
+    if embedder in ("configured", "local"):
+        from app.components.embeddings import get_embedding_model
+        embedding_model = get_embedding_model(None if embedder == "configured" else embedder, cached=False)
+    else:
+        from app.components.fake_bedrock import FakeEmbeddings
+        embedding_model = FakeEmbeddings()
+
+    stages = {}
+
+    with Stage("load", "pages") as stage:
+        documents = scale_documents(load_pdf_files(data_path), scale)
+    if not documents:
+        raise SystemExit(f"No PDF pages loaded from {data_path}")
+    stages["load"] = stage.record(len(documents))
+
+    with Stage("chunk", "chunks") as stage:
+        chunks = create_text_chunks(documents)
+    stages["chunk"] = stage.record(len(chunks))
+
+    if dedup:
+        from app.components.dedup import deduplicate_chunks
+
+        with Stage("dedup", "chunks") as stage:
+            chunks, dedup_stats = deduplicate_chunks(chunks)
+        stages["dedup"] = stage.record(dedup_stats["input"], output=len(chunks), dedup_ratio=dedup_stats["dedup_ratio"])
+
+    texts = [c.page_content for c in chunks]
+    with Stage("embed", "vectors") as stage:
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(embedding_model.embed_documents(texts[start:start + batch_size]))
+    stages["embed"] = stage.record(len(vectors), dimension=len(vectors[0]) if vectors else 0)
+
+    with tempfile.TemporaryDirectory() as index_dir, Stage("index", "vectors") as stage:
+        db = FAISS.from_embeddings(
+            list(zip(texts, vectors)),
+            embedding_model,
+            metadatas=[c.metadata for c in chunks],
+        )
+        db.save_local(index_dir)
+        index_bytes = sum(
+            os.path.getsize(os.path.join(index_dir, f)) for f in os.listdir(index_dir)
+        )
+    stages["index"] = stage.record(len(vectors), index_size_mb=round(index_bytes / 1024 / 1024, 2))
+
+    return {
+        "scale": scale,
+        "pages": len(documents),
+        "chunks": len(chunks),
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 3),
+        "stages": stages,
+    }
+
+
+def print_run(run):
+    print(f"\nscale x{run['scale']}: {run['pages']} pages, {run['chunks']} chunks, {run['total_seconds']} s")
+    print(f"  {'stage':<8}{'seconds':>10}{'items':>9}{'rate/s':>12}{'peak RSS MB':>14}")
+    for name, stage in run["stages"].items():
+        rate = next(v for k, v in stage.items() if k.endswith("_per_sec"))
+        print(f"  {name:<8}{stage['seconds']:>10}{stage['items']:>9}{rate:>12}{stage['peak_rss_mb']:>14}")
+    print(f"  index size: {run['stages']['index']['index_size_mb']} MB")
+
+
+def main():
+    from app.config.config import DATA_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-path", default=DATA_PATH)
+    parser.add_argument("--scale", type=int, action="append", help="Corpus multiplier (repeatable)")
+    parser.add_argument("--embedder", choices=["fake", "local", "configured"], default="fake")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--no-dedup", action="store_true", help="Skip near-duplicate elimination")
+    parser.add_argument("--output", help="Results file (default: bench/results/ingest_<timestamp>.json)")
+    args = parser.parse_args()
+
+    runs = []
+    for scale in args.scale or [1]:
+        run = run_benchmark(args.data_path, scale, args.embedder, args.batch_size, dedup=not args.no_dedup)
+        print_run(run)
+        runs.append(run)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"ingest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "benchmark": "ingest",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "embedder": args.embedder,
+            "runs": runs,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Load generator for the request path: /api/ask, /c/{id} and /api/upload-document.
+
+By default the FastAPI app runs in-process with the fake Bedrock stand-ins
+(BEDROCK_BACKEND=fake) and the in-memory Mongo (MONGO_URI=memory://), so a
+run costs nothing and needs no network. Point MONGO_URI at a local mongod to
+include real database latency, or pass --url to drive a running server.
+The server has no endpoint for creating conversations, so with --url the
+chat conversations are seeded directly in the server's database: set
+MONGO_URI to it, or "chat" is left out of the run.
+
+    python -m bench.loadtest --concurrency 20 --duration 30
+    python -m bench.loadtest --endpoints ask,chat --output results.json
+    FAKE_LLM_LATENCY=lognormal:800:0.3 python -m bench.loadtest
+"""
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+
+QUESTIONS = [
+    "What schemes am I eligible for?",
+    "Which scholarships can I apply for after class 12?",
+    "Am I eligible for any state scholarship based on my marks?",
+    "What documents do I need for the post-matric scholarship?",
+    "Are there schemes for students from my category and income?",
+]
+
+STATES = ["Bihar", "Uttar Pradesh", "Madhya Pradesh", "Jharkhand"]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _default_upload_file():
+    images = sorted(glob.glob(os.path.join("storage", "*", "*.jp*g")))
+    return images[0] if images else None
+
+
+def _can_seed_conversations(in_process) -> bool:
+    """Whether conversations created here are visible to the server under test."""
+    if in_process:
+        return True
+    uri = os.getenv("MONGO_URI", "")
+    return bool(uri) and not uri.startswith("memory://")
+
+
+async def _create_user(client, index, seed_conversation):
+    email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+    res = await client.post("/api/register", json={"email": email, "password": "loadtest"})
+    res.raise_for_status()
+    body = res.json()
+    headers = {"Authorization": f"Bearer {body['token']}"}
+
+    res = await client.post(
+        "/api/profile/basic",
+        json={"name": f"Load Test {index}", "dob": "2006-01-01", "state": random.choice(STATES)},
+        headers=headers,
+    )
+    res.raise_for_status()
+
+    conversation_id = None
+    if seed_conversation:
+        from app.repo import create_conversation
+        conversation_id = await create_conversation(body["user_id"])
+
+    return {"headers": headers, "conversation_id": conversation_id}
+
+
+async def _request(client, endpoint, user, upload):
+    question = random.choice(QUESTIONS)
+    if endpoint == "ask":
+        return await client.post("/api/ask", json={"question": question}, headers=user["headers"])
+    if endpoint == "chat":
+        return await client.post(
+            f"/c/{user['conversation_id']}",
+            data={"prompt": question},
+            headers=user["headers"],
+        )
+    if endpoint == "upload":
+        name, content = upload
+        return await client.post(
+            "/api/upload-document",
+            files={"file": (name, content, "image/jpeg")},
+            data={"doc_type": "12th_marksheet"},
+            headers=user["headers"],
+        )
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+async def _worker(client, endpoints, users, upload, deadline, results):
+    while time.perf_counter() < deadline:
+        endpoint = random.choice(endpoints)
+        user = random.choice(users)
+        started = time.perf_counter()
+        try:
+            res = await _request(client, endpoint, user, upload)
+            ok = res.status_code < 400
+        except Exception:
+            ok = False
+        results[endpoint].append((time.perf_counter() - started, ok))
+
+
+def summarize(results, elapsed):
+    report = {"elapsed_s": round(elapsed, 2), "endpoints": {}}
+    total = 0
+    for endpoint, samples in sorted(results.items()):
+        latencies = [lat * 1000 for lat, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        total += len(samples)
+        report["endpoints"][endpoint] = {
+            "requests": len(samples),
+            "errors": errors,
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "max_ms": round(max(latencies, default=0.0), 1),
+        }
+    report["throughput_rps"] = round(total / elapsed, 2)
+    return report
+
+
+def print_report(report):
+    print(f"\n{'endpoint':<10}{'reqs':>8}{'errs':>7}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for endpoint, row in report["endpoints"].items():
+        print(
+            f"{endpoint:<10}{row['requests']:>8}{row['errors']:>7}{row['throughput_rps']:>9}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+    print(f"\nTotal throughput: {report['throughput_rps']} req/s over {report['elapsed_s']} s")
+
+
+async def run(args):
+    import httpx
+
+    in_process = not args.url
+    if in_process:
+        from app.application import app
+        from app.components.retriever import create_qa_chain
+
+        await app.router.startup()
+        await app.state.warmup_task
+        if app.state.qa_chain is None:
+            app.state.qa_chain = create_qa_chain(prefetch=True)
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=None
+        )
+    else:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    seed_conversations = "chat" in endpoints and _can_seed_conversations(in_process)
+    if "chat" in endpoints and not seed_conversations:
+        # Posting to a conversation that doesn't exist skips the write and
+        # would make /c/{id} look faster than it is
+        print("chat: skipped (set MONGO_URI to the server's database to seed conversations)")
+        endpoints.remove("chat")
+    if not endpoints:
+        raise SystemExit("No endpoints to run")
+    upload = None
+    if "upload" in endpoints:
+        path = args.upload_file or _default_upload_file()
+        if not path:
+            raise SystemExit("No upload file found; pass --upload-file")
+        with open(path, "rb") as f:
+            upload = (os.path.basename(path), f.read())
+
+    async with client:
+        users = [await _create_user(client, i, seed_conversations) for i in range(args.users)]
+
+        results = defaultdict(list)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            _worker(client, endpoints, users, upload, deadline, results)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    if in_process:
+        await app.router.shutdown()
+
+    return summarize(results, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Drive a running server instead of the in-process app")
+    parser.add_argument("--endpoints", default="ask,chat", help="Comma-separated: ask, chat, upload")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--upload-file", help="Image used for upload requests")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if not args.url:
+        os.environ.setdefault("BEDROCK_BACKEND", "fake")
+        os.environ.setdefault("MONGO_URI", "memory://")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+OCR benchmark: per-language-set reader load time, per-image latency,
+confidence and memory.
+
+Runs every image through each language set in turn, each with a fresh
+reader pool so load time and RSS growth are per set (torch itself loads
+once, so the first set also carries it). Without --images the
+first pages of data/pdfs are rendered and used; pass real marksheets and
+certificates, Hindi ones included, for meaningful numbers. Results are
+written as JSON next to the other benchmarks'.
+
+    python -m bench.ocr_bench --images samples/ --langs en --langs hi+en
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from bench.ingest_bench import RESULTS_DIR, git_revision, peak_rss_mb
+from bench.loadtest import percentile
+
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg")
+
+
+def find_images(paths):
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in IMAGE_PATTERNS:
+                images.extend(glob.glob(os.path.join(path, pattern)))
+        else:
+            images.append(path)
+    return sorted(images)
+
+
+def render_pdf_pages(data_path, limit, out_dir):
+    """Render up to `limit` first pages of the corpus PDFs to PNGs in `out_dir`."""
+    import pypdfium2 as pdfium
+    from app.config.config import PDF_RENDER_SCALE
+
+    images = []
+    for name in sorted(os.listdir(data_path)):
+        if len(images) >= limit:
+            break
+        if not name.lower().endswith(".pdf"):
+            continue
+        pdf = pdfium.PdfDocument(os.path.join(data_path, name))
+        try:
+            page = pdf[0]
+            image = page.render(scale=PDF_RENDER_SCALE).to_pil()
+            path = os.path.join(out_dir, f"{os.path.splitext(name)[0]}.png")
+            image.save(path)
+            page.close()
+            images.append(path)
+        finally:
+            pdf.close()
+    return images
+
+
+def run_langs(langs, images):
+    from app.config.config import OCR_POOL_BUDGET_MB, OCR_READER_ESTIMATE_MB
+    from app.documents import ocr
+
+    # Fresh pool, so readers from the previous set are neither reused nor counted
+    ocr._pool = ocr.ReaderPool(OCR_POOL_BUDGET_MB, OCR_READER_ESTIMATE_MB)
+    rss_before = ocr._rss_mb()
+
+    started = time.perf_counter()
+    ocr.get_reader(langs)
+    load_seconds = time.perf_counter() - started
+
+    latencies, confidences, chars, chosen = [], [], 0, {}
+    for image in images:
+        started = time.perf_counter()
+        result = ocr.read_image_detailed(image, langs)
+        latencies.append((time.perf_counter() - started) * 1000)
+        confidences.append(result["confidence"])
+        chars += len(result["text"])
+        chosen[result["langs"]] = chosen.get(result["langs"], 0) + 1
+
+    return {
+        "langs": "+".join(langs),
+        "images": len(images),
+        "load_seconds": round(load_seconds, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "mean_confidence": round(sum(confidences) / len(confidences), 3) if confidences else 0.0,
+        "chars": chars,
+        "langs_chosen": chosen,
+        "readers_loaded": ocr.loaded_readers(),
+        "rss_growth_mb": round(ocr._rss_mb() - rss_before, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_runs(runs):
+    print(f"\n{'langs':<10}{'images':>8}{'load s':>9}{'p50 ms':>10}{'p95 ms':>10}{'conf':>7}{'chars':>9}{'+RSS MB':>9}")
+    for r in runs:
+        print(
+            f"{r['langs']:<10}{r['images']:>8}{r['load_seconds']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+            f"{r['mean_confidence']:>7}{r['chars']:>9}{r['rss_growth_mb']:>9}"
+        )
+
+
+def main():
+    from app.config.config import DATA_PATH
+    from app.documents.ocr import parse_langs
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", action="append", help="Image file or directory (repeatable)")
+    parser.add_argument("--data-path", default=DATA_PATH, help="PDFs to render when no --images are given")
+    parser.add_argument("--pages", type=int, default=10, help="PDF pages to render when no --images are given")
+    parser.add_argument("--langs", action="append",
+                        help='Language set, e.g. "en", "hi+en" or "mixed" (repeatable, default: en, hi+en)')
+    parser.add_argument("--output", help="Results file (default: bench/results/ocr_<timestamp>.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ocr-bench-") as tmp_dir:
+        images = find_images(args.images) if args.images else render_pdf_pages(args.data_path, args.pages, tmp_dir)
+        if not images:
+            raise SystemExit("No images to OCR")
+
+        runs = []
+        for langs in args.langs or ["en", "hi+en"]:
+            try:
+                runs.append(run_langs(parse_langs(langs), images))
+            except Exception as e:
+                print(f"{langs}: skipped ({e})")
+    print_runs(runs)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"ocr_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "benchmark": "ocr",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "runs": runs,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
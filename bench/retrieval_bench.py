@@ -0,0 +1,211 @@
+"""
+Retrieval benchmark: quality and latency over a golden question set.
+
+Each case in bench/retrieval_golden.json is a student profile, a question and
+the scheme (name aliases) plus source PDFs that answer it. Every case runs
+through the chain's real retrieval step (create_context_retriever: guards,
+rerank, dedup and token budget, without the shared cache) and is scored on
+the documents that would go into the prompt. A document is relevant when it
+comes from one of the expected PDFs and names the expected scheme.
+
+Reports recall@1/@3/@k, source recall@k (right PDF, any scheme), MRR, mean
+prompt tokens retrieved and p50/p99 latency per retriever and k. By default
+a FAISS index is built from data/pdfs with the local embedder, so the run is
+fully offline; results are written as JSON next to the other benchmarks'.
+
+    python -m bench.retrieval_bench
+    python -m bench.retrieval_bench --k 4 --k 8 --rerank
+    python -m bench.retrieval_bench --index vectorstore/db_faiss --embedder configured
+    python -m bench.retrieval_bench --retriever bedrock      # needs AWS access
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from bench.ingest_bench import RESULTS_DIR, git_revision, peak_rss_mb
+from bench.loadtest import percentile
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_golden.json")
+
+
+def load_cases(path):
+    with open(path) as f:
+        cases = json.load(f)["cases"]
+    if not cases:
+        raise SystemExit(f"No cases in {path}")
+    return cases
+
+
+def _embedding_model(embedder):
+    if embedder == "fake":
+        from app.components.fake_bedrock import FakeEmbeddings
+        return FakeEmbeddings()
+    from app.components.embeddings import get_embedding_model
+    # Uncached: the benchmark measures retrieval, not the shared cache
+    return get_embedding_model(None if embedder == "configured" else embedder, cached=False)
+
+
+def build_index(data_path, embedder, index_path=None):
+    """FAISS index over the corpus, loaded from `index_path` or built in memory."""
+    from langchain_community.vectorstores import FAISS
+
+    embedding_model = _embedding_model(embedder)
+    if index_path:
+        return FAISS.load_local(index_path, embedding_model, allow_dangerous_deserialization=True)
+
+    from app.components.dedup import deduplicate_chunks
+    from app.components.pdf_loader import load_pdf_files, create_text_chunks
+
+    chunks = create_text_chunks(load_pdf_files(data_path))
+    if not chunks:
+        raise SystemExit(f"No chunks produced from {data_path}")
+    chunks, _ = deduplicate_chunks(chunks)
+    return FAISS.from_documents(chunks, embedding_model)
+
+
+def source_name(doc) -> str:
+    """PDF file name of a FAISS document or a Knowledge Base result (S3 location)."""
+    source = doc.metadata.get("source") or (
+        (doc.metadata.get("location") or {}).get("s3Location", {}).get("uri") or ""
+    )
+    return os.path.basename(source)
+
+
+def is_relevant(doc, case) -> bool:
+    if source_name(doc) not in case["expected_sources"]:
+        return False
+    text = f"{doc.metadata.get('scheme_name') or ''}\n{doc.page_content}".lower()
+    return any(alias.lower() in text for alias in case["expected_schemes"])
+
+
+def score(docs, case) -> dict:
+    sources = [source_name(d) for d in docs]
+    rank = next((i + 1 for i, d in enumerate(docs) if is_relevant(d, case)), None)
+    return {
+        "id": case["id"],
+        "rank": rank,
+        "source_hit": any(s in case["expected_sources"] for s in sources),
+        "docs": len(docs),
+        "sources": sources,
+    }
+
+
+async def run_retriever(name, retriever, cases, k, rerank=False):
+    """Score every case against `retriever` as the chain would use it."""
+    from app.components.context_budget import estimate_tokens
+    from app.components.profile_context import build_qa_input
+    from app.components.retriever import create_context_retriever
+
+    context_retriever = create_context_retriever(retriever, rerank=rerank, cached=False)
+
+    def chain_input(case):
+        return {"input": build_qa_input(case["profile"], case["question"]), "question": case["question"]}
+
+    # One untimed call so lazy model and index setup is not counted as latency
+    await context_retriever.ainvoke(chain_input(cases[0]))
+
+    latencies, tokens, results = [], [], []
+    for case in cases:
+        started = time.perf_counter()
+        docs = await context_retriever.ainvoke(chain_input(case))
+        latencies.append((time.perf_counter() - started) * 1000)
+        tokens.append(sum(estimate_tokens(d.page_content) for d in docs))
+        results.append(score(docs, case))
+
+    def recall_at(n):
+        return round(sum(1 for r in results if r["rank"] and r["rank"] <= n) / len(results), 3)
+
+    return {
+        "retriever": name,
+        "k": k,
+        "rerank": rerank,
+        "cases": len(cases),
+        "recall_at_1": recall_at(1),
+        "recall_at_3": recall_at(3),
+        "recall_at_k": recall_at(k),
+        "source_recall_at_k": round(sum(1 for r in results if r["source_hit"]) / len(results), 3),
+        "mrr": round(sum(1 / r["rank"] for r in results if r["rank"]) / len(results), 3),
+        "mean_tokens": round(sum(tokens) / len(tokens)),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "misses": [r["id"] for r in results if not r["rank"]],
+        "results": results,
+    }
+
+
+def _retriever(name, db, k):
+    if name == "bedrock":
+        from app.components.bedrock_retriever import get_bedrock_retriever
+        return get_bedrock_retriever()
+    return db.as_retriever(search_kwargs={"k": k})
+
+
+def print_runs(runs):
+    print(f"\n{'retriever':<10}{'k':>4}{'R@1':>7}{'R@3':>7}{'R@k':>7}{'src@k':>7}{'MRR':>7}{'tokens':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in runs:
+        print(
+            f"{r['retriever']:<10}{r['k']:>4}{r['recall_at_1']:>7}{r['recall_at_3']:>7}{r['recall_at_k']:>7}"
+            f"{r['source_recall_at_k']:>7}{r['mrr']:>7}{r['mean_tokens']:>8}{r['p50_ms']:>9}{r['p99_ms']:>9}"
+        )
+        if r["misses"]:
+            print(f"  missed: {', '.join(r['misses'])}")
+
+
+def main():
+    from app.config.config import DATA_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="Golden question set")
+    parser.add_argument("--data-path", default=DATA_PATH, help="PDFs to index when no --index is given")
+    parser.add_argument("--index", help="Existing FAISS index directory to load instead of building one")
+    parser.add_argument("--embedder", choices=["local", "fake", "configured"], default="local",
+                        help="Embedding model for the FAISS index (default: local)")
+    parser.add_argument("--retriever", action="append", choices=["faiss", "bedrock"],
+                        help="Retriever to measure (repeatable, default: faiss)")
+    parser.add_argument("--k", type=int, action="append", help="Documents per FAISS search (repeatable, default: 6)")
+    parser.add_argument("--rerank", action="store_true", help="Rerank with the cross-encoder, as RERANK_ENABLED does")
+    parser.add_argument("--output", help="Results file (default: bench/results/retrieval_<timestamp>.json)")
+    args = parser.parse_args()
+
+    cases = load_cases(args.golden)
+    retrievers = args.retriever or ["faiss"]
+
+    db, build_seconds = None, 0.0
+    if "faiss" in retrievers:
+        started = time.perf_counter()
+        db = build_index(args.data_path, args.embedder, args.index)
+        build_seconds = time.perf_counter() - started
+
+    runs = []
+    for name in retrievers:
+        # The Knowledge Base returns its configured numberOfResults (6)
+        for k in (args.k or [6]) if name == "faiss" else [6]:
+            try:
+                runs.append(asyncio.run(run_retriever(name, _retriever(name, db, k), cases, k, args.rerank)))
+            except Exception as e:
+                print(f"{name}: skipped ({e})")
+    print_runs(runs)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"retrieval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "benchmark": "retrieval",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "golden": os.path.relpath(args.golden),
+            "embedder": args.embedder if "faiss" in retrievers else None,
+            "index_seconds": round(build_seconds, 2),
+            "runs": runs,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()